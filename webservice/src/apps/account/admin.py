@@ -8,7 +8,7 @@ from django.contrib.auth.forms import AdminPasswordChangeForm
 from django.contrib.auth.models import Group
 
 from account.forms import AdminChangeForm, AdminCreationForm
-from account.models import Instructor, Student, Profile
+from account.models import Instructor, Student, Profile, AuthToken
 
 User = get_user_model()
 
@@ -73,3 +73,7 @@ class StudentAdmin(admin.ModelAdmin):
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     pass
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created')
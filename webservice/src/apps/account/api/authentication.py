@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from account.models import AuthToken, User
+
+def get_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE', 'default')]
+
+def token_key(digest):
+    return 'auth-token:{0}'.format(digest)
+
+def forget_tokens(digests):
+    """
+    Drop the cached users of deleted tokens, see account.signals.
+    """
+    get_cache().delete_many([token_key(digest) for digest in digests])
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    Authenticate with the `Authorization: Token <key>` header. The token is
+    looked up by the digest of its key, and the id of its user is kept in
+    the shared cache so that following requests only load the user row.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise AuthenticationFailed(_('Invalid token header.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_('Invalid token header.'))
+
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        digest = AuthToken.hash_key(key)
+        cache = get_cache()
+        user_id = cache.get(token_key(digest))
+        if user_id is not None:
+            user = User.objects.filter(pk=user_id).first()
+        else:
+            token = AuthToken.objects.valid().select_related('user').filter(digest=digest).first()
+            user = token.user if token is not None else None
+            if user is not None:
+                # never past the expiry of the token
+                timeout = min(
+                    getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 60),
+                    (token.expires - timezone.now()).total_seconds(),
+                )
+                cache.set(token_key(digest), user.pk, timeout)
+
+        if user is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, digest)
+
+    def authenticate_header(self, request):
+        return self.keyword
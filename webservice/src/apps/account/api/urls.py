@@ -2,6 +2,7 @@ from django.urls import path, include
 
 from .views import (
     LoginAPIView,
+    LogoutAPIView,
     RegisterAPIView,
     UserRetrieveAPIView,
     UserUpdateAPIView,
@@ -16,6 +17,7 @@ app_name = "api_accounts"
 
 urlpatterns = [
     path('login', LoginAPIView.as_view(), name='login'),
+    path('logout', LogoutAPIView.as_view(), name='logout'),
     path('register', RegisterAPIView.as_view(), name='register'),
     path('update', UserUpdateAPIView.as_view()),
     path('delete', UserDeleteAPIView.as_view()),
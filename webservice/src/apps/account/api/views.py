@@ -15,7 +15,7 @@ from rest_framework.generics import (
     GenericAPIView
 )
 
-from account.models import Student
+from account.models import Student, AuthToken
 from account.api.serializers import (
     LoginSerializer,
     RegisterSerializer,
@@ -66,7 +66,10 @@ class LoginAPIView(APIView):
                         "error_code": 4033
                     }
                     return Response(message, status=status.HTTP_403_FORBIDDEN)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+
+            data = serializer.data
+            token, data['token'] = AuthToken.objects.create_token(user)
+            return Response(data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class RegisterAPIView(APIView):
@@ -107,6 +110,14 @@ class UserRetrieveAPIView(RetrieveAPIView):
 
         return Response(data)
 
+class LogoutAPIView(APIView):
+    """
+    Delete the token of the request.
+    """
+    def post(self, request, *args, **kwargs):
+        AuthToken.objects.filter(digest=request.auth).delete()
+        return Response(status=status.HTTP_200_OK)
+
 class UserDeleteAPIView(APIView):
 
     def post(self, request, *args, **kwargs):
@@ -150,7 +161,9 @@ class UserChangePasswordUpdateAPIView(UpdateAPIView):
             if new_password == confirm_password:
                 self.object.set_password(new_password)
                 self.object.save()
-                return Response(status=status.HTTP_200_OK)
+                # every token was revoked with the old password
+                token, key = AuthToken.objects.create_token(self.object)
+                return Response({'token': key}, status=status.HTTP_200_OK)
             else:
                 error_message = {'new_password': [_('Passwords do not match.')]}
                 return Response(error_message, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from account.models import AuthToken
+
+class Command(BaseCommand):
+    help = 'Delete auth tokens older than AUTH_TOKEN_LIFETIME days.'
+
+    def handle(self, *args, **options):
+        deleted, rows = AuthToken.objects.expired().delete()
+        self.stdout.write('Deleted {0} expired tokens.'.format(deleted))
@@ -1,3 +1,7 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.urls import reverse
@@ -184,3 +188,55 @@ class Profile(models.Model):
 
     def __str__(self):
         return self.user.username
+
+class AuthTokenQuerySet(models.query.QuerySet):
+    def valid(self):
+        return self.filter(created__gt=timezone.now() - AuthToken.lifetime())
+
+    def expired(self):
+        return self.filter(created__lte=timezone.now() - AuthToken.lifetime())
+
+class AuthTokenManager(models.Manager):
+    def get_queryset(self):
+        return AuthTokenQuerySet(self.model, using=self._db)
+
+    def valid(self):
+        return self.get_queryset().valid()
+
+    def expired(self):
+        return self.get_queryset().expired()
+
+    def create_token(self, user):
+        """
+        Create a token for the user and return it with its key. Only the
+        digest of the key is stored, the key itself is given to the user.
+        """
+        key = secrets.token_hex(20)
+        token = self.create(user=user, digest=AuthToken.hash_key(key))
+        return token, key
+
+class AuthToken(models.Model):
+    user    = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    digest  = models.CharField(_('Digest'), max_length=64, unique=True)
+    created = models.DateTimeField(_('Created'), default=timezone.now)
+
+    objects = AuthTokenManager()
+
+    class Meta:
+        verbose_name = _('Auth Token')
+        verbose_name_plural = _('Auth Tokens')
+
+    def __str__(self):
+        return self.user.username
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def lifetime():
+        return timedelta(days=getattr(settings, 'AUTH_TOKEN_LIFETIME', 30))
+
+    @property
+    def expires(self):
+        return self.created + AuthToken.lifetime()
@@ -1,9 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from account.models import User, Profile, Instructor
+from account.models import User, Profile, Instructor, AuthToken
+from account.api.authentication import forget_tokens
 
 @receiver(post_save, sender=User)
 def user_post_save_receiver(sender, instance, created, *args, **kwargs):
     if created:
         profile = Profile(user=instance)
         profile.save()
+    # set_password keeps the raw password in _password until the save
+    # is done, a new password or a deactivated account ends every token
+    elif not instance.is_active or instance._password is not None:
+        AuthToken.objects.filter(user=instance).delete()
+
+@receiver(post_delete, sender=AuthToken)
+def auth_token_post_delete_receiver(sender, instance, *args, **kwargs):
+    forget_tokens([instance.digest])
@@ -1,3 +1,78 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from account.models import User, Student, AuthToken
+from account.api.authentication import TokenAuthentication, get_cache
 
 # Create your tests here.
+class TokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@quizmaker.com', 'password', user_type='S')
+        Student.objects.create(user=cls.user, student_id='1')
+
+    def setUp(self):
+        get_cache().clear()
+        self.token, self.key = AuthToken.objects.create_token(self.user)
+
+    def test_user_row_is_loaded(self):
+        authentication = TokenAuthentication()
+        first, digest = authentication.authenticate_credentials(self.key)
+        # the user row alone once the token is cached
+        with self.assertNumQueries(1):
+            second, digest = authentication.authenticate_credentials(self.key)
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertIsNot(first, second)
+
+        # a deactivation without signals is seen by the next request
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(self.key)
+
+    def test_deleted_token(self):
+        authentication = TokenAuthentication()
+        authentication.authenticate_credentials(self.key)
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(self.key)
+
+    def test_expired_token(self):
+        AuthToken.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(days=31))
+        with self.assertRaises(AuthenticationFailed):
+            TokenAuthentication().authenticate_credentials(self.key)
+
+        valid, key = AuthToken.objects.create_token(self.user)
+        call_command('purge_auth_tokens', stdout=StringIO())
+        self.assertEqual(list(AuthToken.objects.all()), [valid])
+
+    def test_logout(self):
+        other, other_key = AuthToken.objects.create_token(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self.key)
+        self.assertEqual(client.get('/api/quiz/').status_code, 200)
+        self.assertEqual(client.post('/api/accounts/logout').status_code, 200)
+        self.assertEqual(client.get('/api/quiz/').status_code, 401)
+        self.assertEqual(list(AuthToken.objects.all()), [other])
+
+    def test_password_change_revokes_tokens(self):
+        other, other_key = AuthToken.objects.create_token(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self.key)
+        response = client.put('/api/accounts/change/password', {
+            'old_password': 'password',
+            'new_password': 'new-password',
+            'confirm_password': 'new-password',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(AuthToken.objects.values_list('digest', flat=True)), [AuthToken.hash_key(response.data['token'])])
+
+        client.credentials(HTTP_AUTHORIZATION='Token ' + other_key)
+        self.assertEqual(client.get('/api/quiz/').status_code, 401)
+        client.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+        self.assertEqual(client.get('/api/quiz/').status_code, 200)
@@ -0,0 +1,260 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from account.models import User, Instructor, Student, Profile
+from course.models import Course
+from question.models import Question, ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant
+from quiz import feed
+from utils.utils import unique_slugs_generator
+
+TOPICS = (
+    'Algorithms', 'Databases', 'Networks', 'Operating Systems', 'Compilers',
+    'Calculus', 'Linear Algebra', 'Statistics', 'Physics', 'Chemistry',
+    'Biology', 'History', 'Economics', 'Philosophy', 'Literature',
+)
+
+QUESTION_TYPES = (
+    (Question.MULTICHOICE, 60),
+    (Question.TRUEFALSE, 25),
+    (Question.TEXT, 15),
+)
+
+PASSWORD = 'benchmark'
+
+def next_id(model):
+    return (model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+
+class DatasetGenerator(object):
+    """
+    Write a synthetic dataset with bulk inserts. Everything is drawn from
+    one seeded random generator and primary keys are given explicitly, so
+    the same seed and sizes give the same rows on an empty database.
+    Signals do not run for bulk inserts; what they keep (slugs, profiles,
+    counters, grades) is written directly.
+    """
+    def __init__(self, seed=0, users=50000, instructors=None, courses=2000,
+                 courses_per_student=3, quizzes=20000, questions_per_quiz=10,
+                 answers=5000000, public_ratio=0.1, batch_size=5000, prefix='bench', log=None):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.instructors = instructors or max(1, users // 25)
+        self.courses = courses
+        self.courses_per_student = courses_per_student
+        self.quizzes = quizzes
+        self.questions_per_quiz = questions_per_quiz
+        self.answers = answers
+        self.public_ratio = public_ratio
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def generate(self):
+        self.create_users()
+        self.create_courses()
+        self.create_quizzes()
+        self.reset_sequences()
+        feed.invalidate()
+
+    def bulk_create(self, model, objs):
+        for start in range(0, len(objs), self.batch_size):
+            model.objects.bulk_create(objs[start:start + self.batch_size])
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        first_id = next_id(User)
+        ids = list(range(first_id, first_id + self.users))
+        self.instructor_ids = ids[:self.instructors]
+        self.student_ids = ids[self.instructors:]
+
+        with transaction.atomic():
+            self.bulk_create(User, [
+                User(
+                    id=id,
+                    username='{0}-{1}'.format(self.prefix, id),
+                    email='{0}-{1}@example.com'.format(self.prefix, id),
+                    password=password,
+                    user_type='I' if id < first_id + self.instructors else 'S',
+                ) for id in ids
+            ])
+            self.bulk_create(Profile, [Profile(user_id=id) for id in ids])
+            self.bulk_create(Instructor, [
+                Instructor(user_id=id, is_approved=True) for id in self.instructor_ids
+            ])
+            self.bulk_create(Student, [
+                Student(user_id=id, student_id='{0}-{1}'.format(self.prefix, id)) for id in self.student_ids
+            ])
+        self.log('Created {0} users, {1} instructors.'.format(self.users, self.instructors))
+
+    def create_courses(self):
+        first_id = next_id(Course)
+        names = [self.rng.choice(TOPICS) for i in range(self.courses)]
+        slugs = unique_slugs_generator(Course, names)
+        self.course_owners = {}
+        self.course_students = {}
+        courses = []
+        for offset, (name, slug) in enumerate(zip(names, slugs)):
+            id = first_id + offset
+            owner_id = self.rng.choice(self.instructor_ids)
+            self.course_owners[id] = owner_id
+            self.course_students[id] = []
+            courses.append(Course(id=id, owner_id=owner_id, name=name, slug=slug))
+
+        course_ids = list(self.course_owners)
+        links = []
+        for student_id in self.student_ids:
+            for course_id in self.rng.sample(course_ids, min(self.courses_per_student, len(course_ids))):
+                self.course_students[course_id].append(student_id)
+                links.append(Course.students.through(course_id=course_id, student_id=student_id))
+
+        with transaction.atomic():
+            self.bulk_create(Course, courses)
+            self.bulk_create(Course.students.through, links)
+        self.log('Created {0} courses with {1} enrollments.'.format(self.courses, len(links)))
+
+    def question(self, id):
+        question_type = self.rng.choices(
+            [choice for choice, weight in QUESTION_TYPES],
+            [weight for choice, weight in QUESTION_TYPES],
+        )[0]
+        question = Question(
+            id=id,
+            question_type=question_type,
+            question='Question {0}'.format(id),
+            point=self.rng.randint(1, 10),
+        )
+        if question_type == Question.MULTICHOICE:
+            question.A, question.B, question.C, question.D = 'A1', 'B1', 'C1', 'D1'
+            question.answer = self.rng.choice('ABCD')
+        elif question_type == Question.TRUEFALSE:
+            question.answer = self.rng.choice(('true', 'false'))
+        return question
+
+    def answer(self, quiz_id, question, participant_id):
+        """
+        Answer a question right six times out of ten, graded the way
+        answers/create and answers/validate grade it.
+        """
+        correct = self.rng.random() < 0.6
+        if question.question_type == Question.TEXT:
+            graded = self.rng.random() < 0.5
+            return ParticipantAnswer(
+                quiz_id=quiz_id,
+                question_id=question.id,
+                participant_id=participant_id,
+                answer='Answer text',
+                is_validated=graded,
+                point=(question.point if correct else 0) if graded else 0,
+            )
+        if correct:
+            answer = question.answer
+        elif question.question_type == Question.MULTICHOICE:
+            answer = self.rng.choice([choice for choice in 'ABCD' if choice != question.answer])
+        else:
+            answer = 'false' if question.answer == 'true' else 'true'
+        return ParticipantAnswer(
+            quiz_id=quiz_id,
+            question_id=question.id,
+            participant_id=participant_id,
+            answer=answer,
+            is_correct=correct,
+            point=question.point if correct else 0,
+        )
+
+    def create_quizzes(self):
+        quiz_id = next_id(Quiz)
+        question_id = next_id(Question)
+        course_ids = list(self.course_owners)
+        started = int(self.quizzes * 2 / 3) or 1
+        per_quiz = self.answers // (started * self.questions_per_quiz) if self.questions_per_quiz else 0
+        chunk = max(1, self.batch_size // max(self.questions_per_quiz, 1))
+        answer_count = 0
+
+        for chunk_start in range(0, self.quizzes, chunk):
+            size = min(chunk, self.quizzes - chunk_start)
+            names = [self.rng.choice(TOPICS) + ' Quiz' for i in range(size)]
+            quizzes, questions, links, participants, answers = [], [], [], [], []
+
+            with transaction.atomic():
+                for name, slug in zip(names, unique_slugs_generator(Quiz, names)):
+                    # two thirds of the quizzes have started, half of those ended
+                    position = chunk_start + len(quizzes)
+                    if position % 3 == 2:
+                        end = self.now + timedelta(days=self.rng.randint(2, 30))
+                        start = end - timedelta(days=1)
+                    elif position % 3 == 1:
+                        end = self.now + timedelta(hours=self.rng.randint(1, 48))
+                        start = self.now - timedelta(hours=1)
+                    else:
+                        end = self.now - timedelta(days=self.rng.randint(1, 60))
+                        start = end - timedelta(hours=2)
+
+                    if self.rng.random() < self.public_ratio or not course_ids:
+                        course_id = None
+                        owner_id = self.rng.choice(self.student_ids)
+                        candidates = self.student_ids
+                    else:
+                        course_id = self.rng.choice(course_ids)
+                        owner_id = self.course_owners[course_id]
+                        candidates = self.course_students[course_id]
+
+                    quiz_questions = [self.question(question_id + i) for i in range(self.questions_per_quiz)]
+                    question_id += self.questions_per_quiz
+
+                    joined = []
+                    if start <= self.now and per_quiz:
+                        picked = self.rng.sample(candidates, min(per_quiz + 1, len(candidates)))
+                        joined = [id for id in picked if id != owner_id][:per_quiz]
+
+                    quizzes.append(Quiz(
+                        id=quiz_id,
+                        owner_id=owner_id,
+                        course_id=course_id,
+                        name=name,
+                        slug=slug,
+                        start=start,
+                        end=end,
+                        is_private=course_id is not None,
+                        percentage=0,
+                        question_count=len(quiz_questions),
+                        participant_count=len(joined),
+                    ))
+                    questions.extend(quiz_questions)
+                    links.extend(
+                        Quiz.questions.through(quiz_id=quiz_id, question_id=question.id)
+                        for question in quiz_questions
+                    )
+                    for participant_id in joined:
+                        paper = [self.answer(quiz_id, question, participant_id) for question in quiz_questions]
+                        answers.extend(paper)
+                        participants.append(QuizParticipant(
+                            quiz_id=quiz_id,
+                            participant_id=participant_id,
+                            grade=sum(answer.point for answer in paper),
+                            completion=100,
+                            finished_in='{0}:{1:02d}'.format(self.rng.randint(1, 59), self.rng.randint(0, 59)),
+                        ))
+                    quiz_id += 1
+
+                self.bulk_create(Quiz, quizzes)
+                self.bulk_create(Question, questions)
+                self.bulk_create(Quiz.questions.through, links)
+                self.bulk_create(QuizParticipant, participants)
+                self.bulk_create(ParticipantAnswer, answers)
+
+            answer_count += len(answers)
+            self.log('Created {0}/{1} quizzes, {2} answers.'.format(
+                chunk_start + size, self.quizzes, answer_count
+            ))
+
+    def reset_sequences(self):
+        models = [User, Course, Quiz, Question, QuizParticipant, ParticipantAnswer]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
@@ -0,0 +1,277 @@
+import gc
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User, Student, Instructor
+from question.models import ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant
+from quiz import feed, session, snapshot, timeline
+from quiz.services import join
+from metrics.collector import summarize
+
+Request = namedtuple('Request', ('user', 'method', 'path', 'data', 'before'))
+
+def sample_users(rng, ids, count):
+    """
+    Return `count` users drawn from the ids, with repetition when there
+    are fewer ids.
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    picked = [rng.choice(ids) for i in range(count)]
+    users = User.objects.in_bulk(set(picked))
+    return [users[id] for id in picked]
+
+def student_ids():
+    return Student.objects.values_list('user_id', flat=True)
+
+def participant_ids():
+    return QuizParticipant.objects.order_by().values_list('participant_id', flat=True).distinct()
+
+def running_public_quizzes():
+    now = timezone.now()
+    return Quiz.objects \
+        .filter(course__isnull=True, is_private=False, is_deleted=False, question_count__gt=0) \
+        .filter(start__lte=now, end__gt=now)
+
+def new_participations(rng, count):
+    """
+    Return `count` distinct (student, quiz) pairs of running public quizzes
+    the student has not joined and does not own.
+    """
+    quizzes = list(running_public_quizzes().values_list('id', 'owner_id'))
+    students = list(student_ids())
+    if not quizzes or not students:
+        return []
+    joined = set(
+        QuizParticipant.objects
+            .filter(quiz_id__in=[id for id, owner_id in quizzes])
+            .values_list('quiz_id', 'participant_id')
+    )
+    pairs = set()
+    attempts = 0
+    while len(pairs) < count and attempts < count * 20:
+        attempts += 1
+        quiz_id, owner_id = rng.choice(quizzes)
+        student_id = rng.choice(students)
+        if student_id != owner_id and (quiz_id, student_id) not in joined:
+            pairs.add((student_id, quiz_id))
+    pairs = sorted(pairs)
+    rng.shuffle(pairs)
+    users = User.objects.in_bulk({student_id for student_id, quiz_id in pairs})
+    return [(users[student_id], quiz_id) for student_id, quiz_id in pairs]
+
+def quiz_feed(rng, count):
+    return [
+        Request(user, 'get', '/api/quiz/', None, feed.invalidate)
+        for user in sample_users(rng, student_ids(), count)
+    ]
+
+def participator_timeline(name):
+    def build(rng, count):
+        return [
+            Request(user, 'get', '/api/quiz/participator/{0}'.format(name), None,
+                    lambda user_id=user.id: timeline.invalidate([user_id]))
+            for user in sample_users(rng, participant_ids(), count)
+        ]
+    return build
+
+def course_list(rng, count):
+    return [
+        Request(user, 'get', '/api/course/', None, None)
+        for user in sample_users(rng, student_ids(), count)
+    ]
+
+def course_owner(rng, count):
+    ids = Instructor.objects.filter(course__isnull=False).values_list('user_id', flat=True).distinct()
+    return [
+        Request(user, 'get', '/api/course/owner', None, None)
+        for user in sample_users(rng, ids, count)
+    ]
+
+def quiz_append(rng, count):
+    return [
+        Request(user, 'put', '/api/quiz/append/{0}'.format(quiz_id), {}, None)
+        for user, quiz_id in new_participations(rng, count)
+    ]
+
+def joined(user_id, quiz_id):
+    """
+    Join the quiz the way the client does before submitting answers.
+    """
+    def before():
+        now = timezone.now()
+        join(quiz_id, user_id, now)
+        session.start(snapshot.get(quiz_id), user_id, now)
+    return before
+
+def answers_create(rng, count):
+    pairs = new_participations(rng, count)
+    questions = {}
+    for quiz_id, question_id, question_type, answer in Quiz.questions.through.objects \
+            .filter(quiz_id__in={quiz_id for user, quiz_id in pairs}) \
+            .values_list('quiz_id', 'question_id', 'question__question_type', 'question__answer'):
+        questions.setdefault(quiz_id, []).append((question_id, question_type, answer))
+    return [
+        Request(user, 'post', '/api/question/answers/create', {
+            'quiz_id': quiz_id,
+            'finished_in': '10:00',
+            'completion': 100,
+            'answers': [
+                {'question_id': question_id, 'answer': answer if rng.random() < 0.5 else 'x'}
+                for question_id, question_type, answer in questions[quiz_id]
+            ],
+        }, joined(user.id, quiz_id))
+        for user, quiz_id in pairs
+    ]
+
+def answers_validate(rng, count):
+    ids = list(
+        QuizParticipant.objects
+            .filter(quiz__course__isnull=False)
+            .order_by('id')
+            .values_list('id', flat=True)
+    )
+    if not ids:
+        return []
+    picked = [rng.choice(ids) for i in range(count)]
+    participants = QuizParticipant.objects.in_bulk(set(picked))
+    owner_of = dict(
+        Quiz.objects
+            .filter(id__in={participant.quiz_id for participant in participants.values()})
+            .values_list('id', 'owner_id')
+    )
+    owners = User.objects.in_bulk(set(owner_of.values()))
+    papers = {}
+    for quiz_id, participant_id, question_id, point in ParticipantAnswer.objects \
+            .filter(quiz_id__in=owner_of, participant_id__in={p.participant_id for p in participants.values()}) \
+            .values_list('quiz_id', 'participant_id', 'question_id', 'question__point'):
+        papers.setdefault((quiz_id, participant_id), []).append({'question_id': question_id, 'point': point // 2})
+
+    requests = []
+    for id in picked:
+        participant = participants[id]
+        requests.append(Request(owners[owner_of[participant.quiz_id]], 'post', '/api/question/answers/validate', {
+            'quiz_id': participant.quiz_id,
+            'participant_id': participant.participant_id,
+            'answers': papers.get((participant.quiz_id, participant.participant_id), []),
+        }, None))
+    return requests
+
+SCENARIOS = (
+    ('quiz-feed', quiz_feed),
+    ('participator-end', participator_timeline('end')),
+    ('participator-waiting', participator_timeline('waiting')),
+    ('course-list', course_list),
+    ('course-owner', course_owner),
+    ('quiz-append', quiz_append),
+    ('answers-create', answers_create),
+    ('answers-validate', answers_validate),
+)
+
+def send(request):
+    client = APIClient()
+    client.force_authenticate(request.user)
+    if request.method == 'get':
+        return client.get(request.path)
+    return getattr(client, request.method)(request.path, request.data, format='json')
+
+def run_scenario(build, rng, count, warmup):
+    requests = build(rng, count + warmup)
+    if not requests:
+        return None
+    latencies, queries, errors = [], [], 0
+    for index, request in enumerate(requests):
+        if request.before is not None:
+            request.before()
+        # a collection during the request would show up as latency
+        gc.collect()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = send(request)
+            elapsed = (time.perf_counter() - start) * 1000
+        if index < warmup:
+            continue
+        latencies.append(round(elapsed, 3))
+        queries.append(len(context.captured_queries))
+        if response.status_code >= 400:
+            errors += 1
+    latency = summarize(latencies)
+    query_counts = summarize(queries)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'latency_ms': {key: latency[key] for key in ('p50', 'p95', 'p99', 'max')},
+        'queries': {key: query_counts[key] for key in ('p50', 'p95', 'p99', 'max')},
+    }
+
+def local_caches():
+    """
+    Settings override which puts every cache alias in local memory, so the
+    sessions and snapshots the requests cache never reach a shared cache.
+    """
+    return override_settings(CACHES={
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark-{0}'.format(alias),
+            'OPTIONS': config.get('OPTIONS', {}),
+        } for alias, config in settings.CACHES.items()
+    })
+
+def run(rng, count=50, warmup=5, names=None, log=None):
+    """
+    Send `count` requests of every scenario through the real views and
+    return their latency and query count percentiles. Everything the
+    requests write is rolled back, and what they cache is kept in local
+    memory caches which are cleared afterwards.
+    """
+    log = log or (lambda message: None)
+    results = {}
+    with local_caches(), transaction.atomic():
+        for name, build in SCENARIOS:
+            if names and name not in names:
+                continue
+            result = run_scenario(build, rng, count, warmup)
+            if result is None:
+                log('{0}: skipped, the dataset has nothing to request.'.format(name))
+                continue
+            results[name] = result
+            log('{0}: p50 {1[p50]:.1f}ms p95 {1[p95]:.1f}ms p99 {1[p99]:.1f}ms, {2[max]} queries, {3} errors'.format(
+                name, result['latency_ms'], result['queries'], result['errors']
+            ))
+        transaction.set_rollback(True)
+        for alias in settings.CACHES:
+            caches[alias].clear()
+    return results
+
+def compare(baseline, results, tolerance, query_tolerance):
+    """
+    Return the regressions of the results against the baseline: failed
+    requests, p95 latency more than `tolerance` (a fraction) slower, or more
+    than `query_tolerance` extra queries.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if result['errors']:
+            regressions.append('{0}: {1} requests failed'.format(name, result['errors']))
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base['latency_ms']['p95'] * (1 + tolerance)
+        if result['latency_ms']['p95'] > limit:
+            regressions.append('{0}: p95 latency {1:.1f}ms, baseline {2:.1f}ms'.format(
+                name, result['latency_ms']['p95'], base['latency_ms']['p95']
+            ))
+        if result['queries']['max'] > base['queries']['max'] + query_tolerance:
+            regressions.append('{0}: {1} queries, baseline {2}'.format(
+                name, result['queries']['max'], base['queries']['max']
+            ))
+    return regressions
@@ -0,0 +1,62 @@
+import json
+import os
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmark import harness
+
+class Command(BaseCommand):
+    help = ('Send requests to the API views through the test client and compare '
+            'latency and query count percentiles with a JSON baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Requests sent before measuring.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            choices=[name for name, build in harness.SCENARIOS],
+                            help='Only run this scenario, can be given more than once.')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmark.json'))
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p95 latency increase as a fraction of the baseline.')
+        parser.add_argument('--query-tolerance', type=int, default=0,
+                            help='Allowed number of extra queries.')
+
+    def handle(self, *args, **options):
+        # the test client needs the testserver host and no mail should be sent
+        setup_test_environment(debug=False)
+        try:
+            results = harness.run(
+                random.Random(options['seed']),
+                count=options['requests'],
+                warmup=options['warmup'],
+                names=options['scenarios'],
+                log=self.stdout.write,
+            )
+        finally:
+            teardown_test_environment()
+
+        if options['save']:
+            with open(options['baseline'], 'w') as output:
+                json.dump({
+                    'vendor': connection.vendor,
+                    'requests': options['requests'],
+                    'scenarios': results,
+                }, output, indent=2, sort_keys=True)
+            self.stdout.write('Saved the baseline to {0}.'.format(options['baseline']))
+            return
+
+        if not os.path.exists(options['baseline']):
+            raise CommandError('There is no baseline at {0}, run with --save first.'.format(options['baseline']))
+        with open(options['baseline']) as baseline:
+            baseline = json.load(baseline)['scenarios']
+
+        regressions = harness.compare(baseline, results, options['tolerance'], options['query_tolerance'])
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write('No regressions against the baseline.')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from benchmark.generator import DatasetGenerator, PASSWORD
+
+class Command(BaseCommand):
+    help = 'Fill the database with a seeded synthetic dataset, for the benchmark command.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--instructors', type=int, help='Defaults to one in 25 users.')
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--courses-per-student', type=int, default=3)
+        parser.add_argument('--quizzes', type=int, default=20000)
+        parser.add_argument('--questions-per-quiz', type=int, default=10)
+        parser.add_argument('--answers', type=int, default=5000000,
+                            help='About this many answers are spread over the started quizzes.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='bench', help='Prefix of usernames and student ids.')
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            users=options['users'],
+            instructors=options['instructors'],
+            courses=options['courses'],
+            courses_per_student=options['courses_per_student'],
+            quizzes=options['quizzes'],
+            questions_per_quiz=options['questions_per_quiz'],
+            answers=options['answers'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            log=self.stdout.write,
+        )
+        generator.generate()
+        self.stdout.write('Done, every user has the password {0!r}.'.format(PASSWORD))
@@ -0,0 +1,47 @@
+import random
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from benchmark import harness
+from benchmark.generator import DatasetGenerator
+from question.models import ParticipantAnswer
+from quiz.models import Quiz
+from quiz import feed
+
+class BenchmarkHarnessTests(TestCase):
+    """
+    Run every scenario on a small generated dataset, the requests must
+    succeed and leave the database as it was.
+    """
+    def setUp(self):
+        DatasetGenerator(seed=1, users=200, courses=10, quizzes=60, questions_per_quiz=4, answers=2000).generate()
+
+    def test_scenarios_run_and_roll_back(self):
+        answers = ParticipantAnswer.objects.count()
+        results = harness.run(random.Random(1), count=3, warmup=1)
+
+        self.assertEqual(set(results), set(name for name, build in harness.SCENARIOS))
+        for name, result in results.items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 3, name)
+        self.assertEqual(ParticipantAnswer.objects.count(), answers)
+
+    def test_cache_untouched(self):
+        cache.clear()
+        harness.run(random.Random(1), count=3, warmup=1)
+        self.assertIsNone(cache.get(feed.VERSION_KEY))
+
+    def test_generated_counters(self):
+        quiz = Quiz.objects.filter(participant_count__gt=0).first()
+        self.assertEqual(quiz.question_count, quiz.questions.count())
+        self.assertEqual(quiz.participant_count, quiz.participants.count())
+
+    def test_compare(self):
+        baseline = {'feed': {'latency_ms': {'p95': 10.0}, 'queries': {'max': 3}}}
+        result = {'feed': {'errors': 0, 'latency_ms': {'p95': 12.0}, 'queries': {'max': 3}}}
+        self.assertEqual(harness.compare(baseline, result, 0.25, 0), [])
+
+        result['feed']['latency_ms']['p95'] = 13.0
+        result['feed']['queries']['max'] = 4
+        self.assertEqual(len(harness.compare(baseline, result, 0.25, 0)), 2)
@@ -29,7 +29,12 @@ class CourseSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super(CourseSerializer, self).to_representation(instance)
-        queryset = Quiz.objects.filter(course__id=instance.id).filter(is_deleted=False).all()
+        if not self.context.get('include_quizzes', True):
+            return data
+
+        queryset = getattr(instance, 'quizzes', None)
+        if queryset is None:
+            queryset = Quiz.objects.filter(course__id=instance.id).filter(is_deleted=False).with_relations()
         serializer = QuizSerializer(instance=queryset, many=True, context={'request': self.context['request']})
         data['quizzes'] = serializer.data
         return data
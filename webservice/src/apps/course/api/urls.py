@@ -8,6 +8,7 @@ from .views import (
     CourseRetrieveAPIView,
     CourseOwnerListAPIView,
     CourseStudentOwnListAPIView,
+    CourseGradebookAPIView,
 )
 
 app_name = "api_courses"
@@ -20,4 +21,5 @@ urlpatterns = [
     path('<pk>', CourseRetrieveAPIView.as_view()),
     path('update/<pk>', CourseUpdateAPIView.as_view()),
     path('delete/<pk>', CourseDeleteAPIView.as_view()),
+    path('gradebook/<pk>/<file_format>', CourseGradebookAPIView.as_view()),
 ]
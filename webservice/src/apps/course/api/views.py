@@ -14,20 +14,45 @@ from rest_framework.generics import (
 )
 
 from course.models import Course
+from course.gradebook import gradebook_lines
 from course.api.serializers import (
     CourseSerializer,
     CourseCreateUpdateSerializer,
 )
+from utils import streaming
 
 User = get_user_model()
 
-class CourseRetrieveAPIView(RetrieveAPIView):
-    queryset = Course.objects.all()
+class CourseListMixin(object):
+    """
+    Build the course representation from one prefetched graph. Embedded
+    quizzes are left out if the `quizzes` query parameter is false. Views
+    implement `get_course_queryset`.
+    """
     serializer_class = CourseSerializer
 
-class CourseOwnerListAPIView(ListAPIView):
+    def include_quizzes(self):
+        return self.request.GET.get("quizzes") not in ('0', 'false', 'False')
+
+    def get_serializer_context(self):
+        context = super(CourseListMixin, self).get_serializer_context()
+        context['include_quizzes'] = self.include_quizzes()
+        return context
+
+    def get_course_queryset(self):
+        return Course.objects.all()
+
+    def get_queryset(self):
+        queryset = self.get_course_queryset()
+        if queryset is None:
+            return Course.objects.none()
+        return queryset.with_relations(include_quizzes=self.include_quizzes())
+
+class CourseRetrieveAPIView(CourseListMixin, RetrieveAPIView):
+    queryset = Course.objects.all()
+
+class CourseOwnerListAPIView(CourseListMixin, ListAPIView):
     queryset = Course.objects.all()
-    serializer_class = CourseSerializer
 
     def get(self, request, *args, **kwargs):
         if request.user.user_type == 'D':
@@ -42,13 +67,12 @@ class CourseOwnerListAPIView(ListAPIView):
             )
         return super(CourseOwnerListAPIView, self).get(request, *args, **kwargs)
 
-    def get_queryset(self):
+    def get_course_queryset(self):
         if self.request.user.is_instructor:
             return Course.objects.filter(owner=self.request.user.instructor).all()
 
-class CourseStudentOwnListAPIView(ListAPIView):
+class CourseStudentOwnListAPIView(CourseListMixin, ListAPIView):
     queryset = Course.objects.all()
-    serializer_class = CourseSerializer
 
     def get(self, request, *args, **kwargs):
         if request.user.user_type != 'S':
@@ -58,13 +82,13 @@ class CourseStudentOwnListAPIView(ListAPIView):
             )
         return super(CourseStudentOwnListAPIView, self).get(request, *args, **kwargs)
 
-    def get_queryset(self):
+    def get_course_queryset(self):
         if self.request.user.is_student:
             return Course.objects.filter(students__user_id=self.request.user.id).all()
 
-class CourseListAPIView(ListAPIView):
+class CourseListAPIView(CourseListMixin, ListAPIView):
     queryset = Course.objects.all()
-    serializer_class = CourseSerializer
+    page_size = 20
 
     def get(self, request, *args, **kwargs):
         if request.user.user_type == 'D':
@@ -99,3 +123,31 @@ class CourseCreateAPIView(CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user.instructor)
+
+class CourseGradebookAPIView(APIView):
+    """
+    Stream the gradebook of a course as `csv` or `jsonl`: one row per
+    student with the grade, completion and finished_in of every quiz and
+    the weighted total in percent. Only the owner can export it.
+    """
+    def get(self, request, pk, file_format, *args, **kwargs):
+        if file_format not in streaming.FORMATS:
+            return Response(
+                {'message': _('File format is not supported.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        course = None
+        if request.user.is_instructor:
+            course = Course.objects.filter(pk=pk).filter(owner=request.user.instructor).first()
+        if course is None:
+            return Response(
+                {'message': _('Course is not found.')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return streaming.streaming_response(
+            gradebook_lines(course, file_format),
+            file_format,
+            'gradebook-{0}'.format(course.slug or course.id)
+        )
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, FilteredRelation, Max, Q, Sum, When
+
+from quiz.models import Quiz
+from utils import streaming
+
+User = get_user_model()
+
+STUDENT_FIELDS = ('user_id', 'student_id', 'username', 'first_name', 'last_name')
+QUIZ_FIELDS = ('grade', 'completion', 'finished_in')
+HUNDRED = Decimal(100)
+CENT = Decimal('0.01')
+
+def course_quizzes(course):
+    """
+    Return the not deleted quizzes of the course with the points they are
+    worth, the columns of the gradebook.
+    """
+    return list(
+        Quiz.objects
+            .filter(course=course)
+            .filter(is_deleted=False)
+            .order_by('end', 'id')
+            .values('id', 'name', 'slug', 'be_graded', 'percentage')
+            .annotate(max_points=Sum('questions__point'))
+    )
+
+def weighted_total(quizzes, grades):
+    """
+    Return the total of a student as a percentage from 0 to 100. Every graded
+    quiz counts with the fraction of its points the student got, a quiz not
+    taken as 0, weighted by the quiz percentages relative to their sum, so
+    the weights do not have to add up to 100 nor the quizzes be worth 100
+    points. None if no graded quiz has points and a weight.
+    """
+    total = weights = Decimal(0)
+    for quiz in quizzes:
+        if not quiz['be_graded'] or not quiz['max_points'] or not quiz['percentage']:
+            continue
+        grade = grades[quiz['id']]['grade'] or 0
+        total += Decimal(grade) / quiz['max_points'] * quiz['percentage']
+        weights += quiz['percentage']
+    if not weights:
+        return None
+    return (total * HUNDRED / weights).quantize(CENT)
+
+def gradebook_rows(course, quizzes):
+    """
+    Yield one row per student of the course with the grade, completion and
+    finished_in of every quiz and the weighted total, see weighted_total.
+    The quiz participations are pivoted into columns by one grouped query
+    which is read with a server side iterator.
+    """
+    columns = OrderedDict()
+    for quiz in quizzes:
+        for field in QUIZ_FIELDS:
+            columns['q{0}_{1}'.format(quiz['id'], field)] = Max(Case(When(
+                entries__quiz_id=quiz['id'],
+                then='entries__{0}'.format(field),
+            )))
+
+    rows = User.objects.filter(student__course=course)
+    if quizzes:
+        rows = rows.annotate(entries=FilteredRelation(
+            'quizparticipant',
+            condition=Q(quizparticipant__quiz_id__in=[quiz['id'] for quiz in quizzes]),
+        ))
+    rows = rows \
+        .values('id', 'student__student_id', 'username', 'first_name', 'last_name') \
+        .annotate(**columns) \
+        .order_by('student__student_id') \
+        .iterator(chunk_size=500)
+
+    for row in rows:
+        grades = OrderedDict()
+        for quiz in quizzes:
+            grades[quiz['id']] = OrderedDict(
+                (field, row['q{0}_{1}'.format(quiz['id'], field)]) for field in QUIZ_FIELDS
+            )
+        yield OrderedDict([
+            ('user_id', row['id']),
+            ('student_id', row['student__student_id']),
+            ('username', row['username']),
+            ('first_name', row['first_name']),
+            ('last_name', row['last_name']),
+            ('quizzes', grades),
+            ('total', weighted_total(quizzes, grades)),
+        ])
+
+def gradebook_lines(course, file_format):
+    """
+    Return the gradebook of the course as CSV or JSON Lines. CSV has a
+    `<quiz slug> <field>` column per quiz and field, JSON Lines has the
+    quizzes of a student keyed by quiz id.
+    """
+    quizzes = course_quizzes(course)
+    rows = gradebook_rows(course, quizzes)
+    if file_format == 'jsonl':
+        return streaming.jsonl_lines(rows)
+
+    columns = list(STUDENT_FIELDS)
+    for quiz in quizzes:
+        columns.extend('{0} {1}'.format(quiz['slug'], field) for field in QUIZ_FIELDS)
+    columns.append('total')
+
+    def values(row):
+        values = [row[field] for field in STUDENT_FIELDS]
+        for entry in row['quizzes'].values():
+            values.extend(entry.values())
+        values.append(row['total'])
+        return values
+
+    return streaming.csv_lines(columns, (values(row) for row in rows))
@@ -1,6 +1,28 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+class CourseQuerySet(models.query.QuerySet):
+    def with_relations(self, include_quizzes=True):
+        """
+        Load the owner and students with their users, and if asked the not
+        deleted quizzes of the courses into `quizzes`, with a fixed number of
+        queries for the whole list.
+        """
+        from account.models import Student
+        from quiz.models import Quiz
+
+        qs = self.select_related('owner__user').prefetch_related(
+            models.Prefetch('students', queryset=Student.objects.select_related('user'))
+        )
+        if include_quizzes:
+            quizzes = Quiz.objects.filter(is_deleted=False).with_relations()
+            qs = qs.prefetch_related(models.Prefetch('quiz_set', queryset=quizzes, to_attr='quizzes'))
+        return qs
+
+class CourseManager(models.Manager):
+    def get_queryset(self):
+        return CourseQuerySet(self.model, using=self._db)
+
 # Create your models here.
 class Course(models.Model):
     owner       = models.ForeignKey('account.Instructor',
@@ -15,6 +37,8 @@ class Course(models.Model):
     timestamp   = models.DateTimeField(auto_now=True)
     updated     = models.DateTimeField(auto_now_add=True)
 
+    objects = CourseManager()
+
     class Meta:
         verbose_name = _('Course')
         verbose_name_plural = _('Courses')
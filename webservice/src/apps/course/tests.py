@@ -1,3 +1,82 @@
+import json
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User, Student, Instructor
+from course.gradebook import course_quizzes, gradebook_rows
+from course.models import Course
+from question.models import Question
+from quiz.models import Quiz, QuizParticipant
 
 # Create your tests here.
+class GradebookTests(TestCase):
+    """
+    One row per student with every quiz of the course, the total is the
+    weighted fraction of the points in percent.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        cls.students = []
+        for i in range(3):
+            user = User.objects.create_user('student{0}'.format(i), 'student{0}@quizmaker.com'.format(i), 'password', user_type='S')
+            cls.students.append(Student.objects.create(user=user, student_id=str(i)))
+        cls.course.students.add(*cls.students)
+
+        # worth 20 and 50 points, weighted 30 and 10
+        cls.quizzes = []
+        for name, points, percentage in (('Midterm', (10, 10), 30), ('Final', (25, 25), 10)):
+            quiz = Quiz.objects.create(owner=cls.instructor, course=cls.course, name=name, percentage=percentage)
+            quiz.questions.add(*[Question.objects.create(question='Question', point=point) for point in points])
+            cls.quizzes.append(quiz)
+        ungraded = Quiz.objects.create(owner=cls.instructor, course=cls.course, name='Practice', be_graded=False)
+        ungraded.questions.add(Question.objects.create(question='Question', point=10))
+
+        midterm, final = cls.quizzes
+        QuizParticipant.objects.bulk_create([
+            QuizParticipant(quiz=midterm, participant=cls.students[0].user, grade=20, completion=100, finished_in='10:00'),
+            QuizParticipant(quiz=final, participant=cls.students[0].user, grade=25, completion=50, finished_in='20:00'),
+            QuizParticipant(quiz=midterm, participant=cls.students[1].user, grade=10, completion=100, finished_in='5:00'),
+            QuizParticipant(quiz=ungraded, participant=cls.students[1].user, grade=10, completion=100, finished_in='1:00'),
+        ])
+
+    def test_rows(self):
+        quizzes = course_quizzes(self.course)
+        self.assertEqual([quiz['max_points'] for quiz in quizzes], [20, 50, 10])
+        rows = list(gradebook_rows(self.course, quizzes))
+        midterm, final = self.quizzes
+
+        self.assertEqual([row['student_id'] for row in rows], ['0', '1', '2'])
+        self.assertEqual(rows[0]['quizzes'][midterm.id]['grade'], 20)
+        self.assertEqual(rows[0]['quizzes'][final.id]['finished_in'], '20:00')
+        self.assertIsNone(rows[2]['quizzes'][midterm.id]['grade'])
+        # (20 / 20 * 30 + 25 / 50 * 10) / 40
+        self.assertEqual(rows[0]['total'], Decimal('87.50'))
+        # (10 / 20 * 30) / 40, the practice quiz is not graded
+        self.assertEqual(rows[1]['total'], Decimal('37.50'))
+        self.assertEqual(rows[2]['total'], Decimal('0.00'))
+
+    def test_export(self):
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        response = client.get('/api/course/gradebook/{0}/jsonl'.format(self.course.id))
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['total'] for row in rows], ['87.50', '37.50', '0.00'])
+
+        response = client.get('/api/course/gradebook/{0}/csv'.format(self.course.id))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].endswith(',total'))
+
+    def test_other_owner(self):
+        other = User.objects.create_user('other', 'other@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=other, is_approved=True)
+        client = APIClient()
+        client.force_authenticate(other)
+        response = client.get('/api/course/gradebook/{0}/csv'.format(self.course.id))
+        self.assertEqual(response.status_code, 404)
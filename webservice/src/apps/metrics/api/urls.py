@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import MetricsAPIView
+
+app_name = "api_metrics"
+
+urlpatterns = [
+    path('', MetricsAPIView.as_view(), name='metrics'),
+]
@@ -0,0 +1,21 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from metrics.collector import registry
+
+class MetricsAPIView(APIView):
+    """
+    Query count, SQL time, wall time and response size percentiles, wall
+    time histograms and repeated queries by route, of this process. DELETE
+    starts over.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(registry.snapshot())
+
+    def delete(self, request, *args, **kwargs):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
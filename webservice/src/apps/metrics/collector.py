@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+
+# upper bounds in milliseconds of the wall time histogram, the last bucket
+# takes everything slower
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PERCENTILES = (50, 90, 95, 99)
+
+class QueryCollector(object):
+    """
+    Database execute wrapper which counts the queries of a request, sums
+    their time and counts how many times every statement ran, in total and
+    with the same parameters.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.calls = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+            self.calls[sql, repr(params)] += 1
+
+    def duplicates(self, threshold):
+        """
+        Return (sql, times, repeats) of the statements which ran at least
+        threshold times, where repeats is the most times one statement ran
+        with the same parameters. Different parameters usually mean a query
+        in a loop (N+1), the same ones a result which could be reused.
+        """
+        repeats = Counter()
+        for (sql, params), times in self.calls.items():
+            repeats[sql] = max(repeats[sql], times)
+        return [
+            (sql, times, repeats[sql])
+            for sql, times in self.statements.most_common() if times >= threshold
+        ]
+
+def percentile(values, p):
+    """
+    Nearest rank percentile of sorted values.
+    """
+    if not values:
+        return None
+    rank = max(int(round(p / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+def summarize(values):
+    values = sorted(value for value in values if value is not None)
+    data = {'p{0}'.format(p): percentile(values, p) for p in PERCENTILES}
+    data['max'] = values[-1] if values else None
+    return data
+
+class RouteMetrics(object):
+    def __init__(self, sample_size):
+        self.count = 0
+        self.samples = deque(maxlen=sample_size)
+        self.histogram = [0] * (len(TIME_BUCKETS) + 1)
+        self.duplicates = {}
+
+    def add(self, queries, sql_time, wall_time, size, duplicates):
+        self.count += 1
+        self.samples.append((queries, sql_time, wall_time, size))
+        bucket = 0
+        while bucket < len(TIME_BUCKETS) and wall_time > TIME_BUCKETS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+        for sql, times, repeats in duplicates:
+            seen = self.duplicates.setdefault(sql, {'requests': 0, 'max_times': 0, 'max_repeats': 0})
+            seen['requests'] += 1
+            seen['max_times'] = max(seen['max_times'], times)
+            seen['max_repeats'] = max(seen['max_repeats'], repeats)
+
+    def snapshot(self):
+        columns = list(zip(*self.samples)) or [(), (), (), ()]
+        bounds = ['{0}'.format(bound) for bound in TIME_BUCKETS] + ['+Inf']
+        duplicates = sorted(self.duplicates.items(), key=lambda item: -item[1]['requests'])
+        return {
+            'requests': self.count,
+            'samples': len(self.samples),
+            'queries': summarize(columns[0]),
+            'sql_ms': summarize(columns[1]),
+            'wall_ms': summarize(columns[2]),
+            'response_bytes': summarize(columns[3]),
+            'wall_ms_histogram': [
+                {'le': bound, 'count': count} for bound, count in zip(bounds, self.histogram)
+            ],
+            'duplicate_queries': [
+                dict(sql=sql, **seen) for sql, seen in duplicates[:10]
+            ],
+        }
+
+class MetricsRegistry(object):
+    """
+    Request metrics of this process by route. The last `sample_size`
+    requests of every route are kept for the percentiles, the histogram
+    counts every request.
+    """
+    def __init__(self, sample_size=1000):
+        self.sample_size = sample_size
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, queries, sql_time, wall_time, size, duplicates=()):
+        with self._lock:
+            metrics = self._routes.get(route)
+            if metrics is None:
+                metrics = self._routes[route] = RouteMetrics(self.sample_size)
+            metrics.add(queries, sql_time, wall_time, size, duplicates)
+
+    def snapshot(self):
+        with self._lock:
+            return {route: metrics.snapshot() for route, metrics in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+registry = MetricsRegistry(getattr(settings, 'METRICS_SAMPLE_SIZE', 1000))
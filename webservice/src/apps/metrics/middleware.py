@@ -0,0 +1,59 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from metrics.collector import QueryCollector, registry
+
+logger = logging.getLogger(__name__)
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '{0} <unresolved>'.format(request.method)
+    name = match.view_name if match.url_name else match.route
+    return '{0} {1}'.format(request.method, name)
+
+class QueryMetricsMiddleware(object):
+    """
+    Count the queries, SQL time, wall time and response size of every
+    request by URL pattern, send them in a `Server-Timing` header and warn
+    about statements which ran many times in one request. Queries of
+    streamed responses run after the view returns and are not counted.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'METRICS_DUPLICATE_QUERY_THRESHOLD', 5)
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        wall_time = round((time.perf_counter() - start) * 1000, 2)
+        sql_time = round(collector.duration * 1000, 2)
+
+        route = route_name(request)
+        duplicates = collector.duplicates(self.threshold)
+        for sql, times, repeats in duplicates:
+            if repeats == times:
+                logger.warning('Same query ran %d times in %s: %s', times, route, sql)
+            else:
+                logger.warning(
+                    'Possible N+1 query in %s, ran %d times, %d with the same parameters: %s',
+                    route, times, repeats, sql
+                )
+
+        size = None if response.streaming else len(response.content)
+        registry.record(route, collector.count, sql_time, wall_time, size, duplicates)
+
+        if self.server_timing:
+            response['Server-Timing'] = 'db;desc="{0} queries";dur={1:.1f}, total;dur={2:.1f}'.format(
+                collector.count, sql_time, wall_time
+            )
+        return response
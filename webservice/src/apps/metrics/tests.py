@@ -0,0 +1,95 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from account.models import User, Instructor
+from course.models import Course
+from metrics.collector import MetricsRegistry, QueryCollector, registry
+
+# Create your tests here.
+class QueryCollectorTests(TestCase):
+    def run_queries(self, collector, calls):
+        execute = lambda sql, params, many, context: None
+        for sql, params in calls:
+            collector(execute, sql, params, False, {})
+
+    def test_duplicates(self):
+        collector = QueryCollector()
+        self.run_queries(collector, [('SELECT a WHERE id = %s', (i,)) for i in range(5)])
+        self.run_queries(collector, [('SELECT b WHERE id = %s', (1,))] * 6)
+        self.run_queries(collector, [('SELECT c', ())] * 4)
+
+        self.assertEqual(collector.count, 15)
+        # a query in a loop and the same query run again and again
+        self.assertEqual(collector.duplicates(5), [
+            ('SELECT b WHERE id = %s', 6, 6),
+            ('SELECT a WHERE id = %s', 5, 1),
+        ])
+        self.assertEqual(collector.duplicates(7), [])
+
+    def test_registry(self):
+        metrics = MetricsRegistry()
+        metrics.record('GET quiz', 10, 1.0, 20.0, 100, [('SELECT a', 6, 1), ('SELECT b', 5, 5)])
+        metrics.record('GET quiz', 8, 1.0, 30.0, 100, [('SELECT a', 8, 2)])
+        self.assertEqual(metrics.snapshot()['GET quiz']['duplicate_queries'], [
+            {'sql': 'SELECT a', 'requests': 2, 'max_times': 8, 'max_repeats': 2},
+            {'sql': 'SELECT b', 'requests': 1, 'max_times': 5, 'max_repeats': 5},
+        ])
+
+class QueryMetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        cls.admin = User.objects.create_user('admin', 'admin@quizmaker.com', 'password', is_staff=True)
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def test_server_timing(self):
+        response = self.client.get('/api/course/{0}'.format(self.course.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;desc="[1-9]\d* queries";dur=\d+\.\d, total;dur=\d+\.\d$'
+        )
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get('/api/course/{0}'.format(self.course.id))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_routes(self):
+        for i in range(3):
+            self.client.get('/api/course/{0}'.format(self.course.id))
+        self.client.get('/api/course/')
+        self.client.post('/api/course/{0}'.format(self.course.id))
+
+        routes = registry.snapshot()
+        self.assertEqual(set(routes), {
+            'GET api/course/<pk>', 'GET api_courses:courses', 'POST api/course/<pk>',
+        })
+        detail = routes['GET api/course/<pk>']
+        self.assertEqual(detail['requests'], 3)
+        self.assertEqual(detail['samples'], 3)
+        self.assertEqual(sum(bucket['count'] for bucket in detail['wall_ms_histogram']), 3)
+        self.assertGreater(detail['queries']['max'], 0)
+        self.assertGreater(detail['response_bytes']['p50'], 0)
+        self.assertEqual(detail['duplicate_queries'], [])
+        self.assertEqual(routes['GET api_courses:courses']['requests'], 1)
+
+    def test_endpoint(self):
+        self.client.get('/api/course/{0}'.format(self.course.id))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['GET api/course/<pk>']['requests'], 1)
+
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 204)
+        # only the request which started over is left
+        self.assertEqual(list(registry.snapshot()), ['DELETE api_metrics:metrics'])
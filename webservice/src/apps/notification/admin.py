@@ -0,0 +1,8 @@
+from django.contrib import admin
+from notification.models import OutgoingMail
+
+# Register your models here.
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'created', 'sent')
+    list_filter = ('status',)
@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notification.models import OutgoingMail
+
+class Command(BaseCommand):
+    help = 'Send queued mails in batches over one mail server connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of mails sent over one connection.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll the queue.')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to wait between polls when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write('Sent {0}, failed {1}.'.format(sent, failed))
+            if not options['loop']:
+                break
+            if not sent and not failed:
+                time.sleep(options['interval'])
+
+    def send_batch(self, batch_size):
+        sent = failed = 0
+        mails = self.claim(batch_size)
+        if not mails:
+            return sent, failed
+
+        # no transaction is open while talking to the mail server, a slow
+        # server does not hold the row locks or the sqlite write lock
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for mail in mails:
+                mail.mark_failed(e)
+            self.save(mails)
+            return sent, len(mails)
+
+        try:
+            for mail in mails:
+                message = EmailMessage(
+                    mail.subject,
+                    mail.message,
+                    mail.from_email,
+                    mail.recipient_list,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    mail.mark_failed(e)
+                    failed = failed + 1
+                else:
+                    mail.mark_sent()
+                    sent = sent + 1
+        finally:
+            connection.close()
+
+        self.save(mails)
+        return sent, failed
+
+    def claim(self, batch_size):
+        """
+        Take due mails off the queue for CLAIM_TIMEOUT seconds, so other
+        workers skip them while they are sent. Mails of a worker which
+        stopped before saving the result are due again afterwards.
+        """
+        with transaction.atomic():
+            # rows locked by another worker are skipped on databases that
+            # support it, sqlite runs one writer at a time anyway
+            mails = list(
+                OutgoingMail.objects.due()
+                .select_for_update(skip_locked=True)
+                .order_by('next_attempt', 'id')[:batch_size]
+            )
+            if mails:
+                claimed = timezone.now() + timedelta(seconds=OutgoingMail.CLAIM_TIMEOUT)
+                OutgoingMail.objects.filter(id__in=[mail.id for mail in mails]).update(next_attempt=claimed)
+                for mail in mails:
+                    mail.next_attempt = claimed
+        return mails
+
+    def save(self, mails):
+        with transaction.atomic():
+            OutgoingMail.objects.bulk_update(
+                mails, ['status', 'attempts', 'last_error', 'next_attempt', 'sent']
+            )
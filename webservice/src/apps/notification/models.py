@@ -0,0 +1,95 @@
+from datetime import timedelta
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
+
+class OutgoingMailQuerySet(models.query.QuerySet):
+    def due(self):
+        return self.filter(status=OutgoingMail.PENDING).filter(next_attempt__lte=timezone.now())
+
+class OutgoingMailManager(models.Manager):
+    def get_queryset(self):
+        return OutgoingMailQuerySet(self.model, using=self._db)
+
+    def due(self):
+        return self.get_queryset().due()
+
+    def queue(self, subject, message, from_email, recipient_list):
+        """
+        Store a mail to be sent by the `send_queued_mail` command instead of
+        talking to the mail server within the request.
+        """
+        return self.create(**OutgoingMail.fields_for(subject, message, from_email, recipient_list))
+
+    def queue_many(self, mails):
+        """
+        Store many (subject, message, from_email, recipient_list) tuples with
+        one query.
+        """
+        return self.bulk_create([
+            OutgoingMail(**OutgoingMail.fields_for(*mail)) for mail in mails
+        ])
+
+class OutgoingMail(models.Model):
+    PENDING = 'P'
+    SENT = 'S'
+    FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    )
+
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 60 # seconds, doubled on every failed attempt
+    CLAIM_TIMEOUT = 600 # seconds a worker has to send a claimed mail before it is due again
+
+    subject      = models.CharField(_('Subject'), max_length=255)
+    message      = models.TextField(_('Message'))
+    from_email   = models.CharField(_('From'), max_length=255)
+    recipients   = models.TextField(_('Recipients'))
+    status       = models.CharField(_('Status'), max_length=1, choices=STATUS_CHOICES, default=PENDING)
+    attempts     = models.PositiveIntegerField(_('Attempts'), default=0)
+    last_error   = models.TextField(_('Last Error'), blank=True)
+    next_attempt = models.DateTimeField(_('Next Attempt'), default=timezone.now)
+    created      = models.DateTimeField(_('Created'), default=timezone.now)
+    sent         = models.DateTimeField(_('Sent'), null=True, blank=True)
+
+    objects = OutgoingMailManager()
+
+    class Meta:
+        verbose_name = _('Outgoing Mail')
+        verbose_name_plural = _('Outgoing Mails')
+        index_together = ('status', 'next_attempt')
+
+    def __str__(self):
+        return self.subject
+
+    @staticmethod
+    def fields_for(subject, message, from_email, recipient_list):
+        return {
+            'subject': subject,
+            'message': message,
+            'from_email': from_email,
+            'recipients': '\n'.join(recipient_list),
+        }
+
+    @property
+    def recipient_list(self):
+        return [r for r in self.recipients.split('\n') if r]
+
+    def mark_sent(self):
+        self.status = OutgoingMail.SENT
+        self.attempts = self.attempts + 1
+        self.sent = timezone.now()
+        self.last_error = ''
+
+    def mark_failed(self, error):
+        self.attempts = self.attempts + 1
+        self.last_error = str(error)
+        if self.attempts >= OutgoingMail.MAX_ATTEMPTS:
+            self.status = OutgoingMail.FAILED
+        else:
+            delay = OutgoingMail.RETRY_DELAY * 2 ** (self.attempts - 1)
+            self.next_attempt = timezone.now() + timedelta(seconds=delay)
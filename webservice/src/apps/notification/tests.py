@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notification.models import OutgoingMail
+
+# Create your tests here.
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise IOError('Mail server is down.')
+
+class RecordingBackend(EmailBackend):
+    """
+    Remember the open savepoints and the due mails while sending.
+    """
+    calls = []
+
+    def send_messages(self, messages):
+        RecordingBackend.calls.append((len(connection.savepoint_ids), OutgoingMail.objects.due().count()))
+        return super(RecordingBackend, self).send_messages(messages)
+
+class SendQueuedMailTests(TestCase):
+    def send(self):
+        call_command('send_queued_mail', stdout=StringIO())
+
+    def test_delivery(self):
+        OutgoingMail.objects.queue('Subject', 'Message', 'from@quizmaker.com', ['a@quizmaker.com', 'b@quizmaker.com'])
+        OutgoingMail.objects.queue_many([
+            ('Graded', 'Message', 'from@quizmaker.com', ['c@quizmaker.com']),
+        ])
+        self.send()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['a@quizmaker.com', 'b@quizmaker.com'])
+        self.assertFalse(OutgoingMail.objects.exclude(status=OutgoingMail.SENT).exists())
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(EMAIL_BACKEND='notification.tests.FailingBackend')
+    def test_retry(self):
+        queued = OutgoingMail.objects.queue('Subject', 'Message', 'from@quizmaker.com', ['a@quizmaker.com'])
+        self.send()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutgoingMail.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertEqual(queued.last_error, 'Mail server is down.')
+        self.assertGreater(queued.next_attempt, timezone.now())
+
+        # not due until the delay passed
+        self.send()
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+
+        for attempt in range(2, OutgoingMail.MAX_ATTEMPTS + 1):
+            OutgoingMail.objects.filter(id=queued.id).update(next_attempt=timezone.now())
+            self.send()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutgoingMail.FAILED)
+        self.assertEqual(queued.attempts, OutgoingMail.MAX_ATTEMPTS)
+
+    @override_settings(EMAIL_BACKEND='notification.tests.RecordingBackend')
+    def test_send_outside_transaction(self):
+        OutgoingMail.objects.queue('Subject', 'Message', 'from@quizmaker.com', ['a@quizmaker.com'])
+        RecordingBackend.calls = []
+        # the savepoint of the test case itself
+        savepoints = len(connection.savepoint_ids)
+        self.send()
+        # claimed mails are not due while they are sent
+        self.assertEqual(RecordingBackend.calls, [(savepoints, 0)])
+        self.assertEqual(OutgoingMail.objects.get().status, OutgoingMail.SENT)
+
+    def test_retry_delay_doubles(self):
+        queued = OutgoingMail(attempts=1)
+        queued.mark_failed('error')
+        first = queued.next_attempt - timezone.now()
+        queued.mark_failed('error')
+        second = queued.next_attempt - timezone.now()
+        self.assertAlmostEqual(second.total_seconds(), 2 * first.total_seconds(), delta=1)
@@ -58,6 +58,13 @@ class QuestionSerializer(serializers.ModelSerializer):
 
         return question
 
+class QuestionWithoutAnswerSerializer(QuestionSerializer):
+    """
+    A question as shown to participants, without its answer.
+    """
+    class Meta(QuestionSerializer.Meta):
+        fields = tuple(field for field in QuestionSerializer.Meta.fields if field != 'answer')
+
 class ParticipantAnswerSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -8,6 +8,7 @@ from .views import (
     ParticipantValidateQuestionAPIView,
     ParticipantAnswerQuestionsAPIView,
     GradeParticipantPaperAPIView,
+    GradeParticipantPapersAPIView,
 )
 
 app_name = "api_question"
@@ -19,5 +20,6 @@ urlpatterns = [
     # path('answers/create', ParticipantAnswerCreateAPIView.as_view()),
     # path('answers/update/<pk>', ParticipantValidateQuestionAPIView.as_view()),
     path('answers/create', ParticipantAnswerQuestionsAPIView.as_view()),
-    path('answers/validate', GradeParticipantPaperAPIView.as_view())
+    path('answers/validate', GradeParticipantPaperAPIView.as_view()),
+    path('answers/validate/bulk', GradeParticipantPapersAPIView.as_view()),
 ]
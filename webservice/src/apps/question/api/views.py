@@ -2,7 +2,6 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from rest_framework.views import APIView
 from rest_framework.generics import (
     RetrieveAPIView,
@@ -13,16 +12,22 @@ from rest_framework.generics import (
     CreateAPIView,
 )
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
 from account.api.permissions import IsAuthenticated
 from question.api.serializers import (
     QuestionSerializer,
     ParticipantAnswerSerializer,
     ParticipantValidateSerializer
 )
-from quiz.models import QuizParticipant
+from quiz.models import Quiz, QuizParticipant
+from quiz import analytics, session, snapshot
 from question.models import ParticipantAnswer, Question
+from question.services import grade_papers, grade_error
 from account.models import User
+from notification.models import OutgoingMail
 
 class QuestionCreateAPIView(CreateAPIView):
     serializer_class = QuestionSerializer
@@ -84,6 +89,18 @@ class ParticipantValidateQuestionAPIView(UpdateAPIView):
 
 
 class ParticipantAnswerQuestionsAPIView(APIView):
+    """
+    Save the answers of the request user for a quiz and grade the ones that
+    can be graded automatically. All questions are fetched with one query
+    and the answers are written with the grade in one transaction. The
+    session of the participant decides if the answers are in time and how
+    long they took, the client does not.
+    """
+    def already_submitted(self):
+        return Response(
+            {'message': _('You have already submitted this quiz.')},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     def post(self, request, *args, **kwargs):
         if request.user.is_instructor:
@@ -92,17 +109,57 @@ class ParticipantAnswerQuestionsAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         quiz_id = request.data.get("quiz_id")
-        finished_in = request.data.get("finished_in")
-        completion = request.data.get("completion")
         answers = request.data.get("answers")
 
-        answers_arr = []
+        if not quiz_id or not isinstance(answers, list):
+            return Response(
+                {'message': _('Quiz and answers are required.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        quiz = snapshot.get(quiz_id)
+        if quiz is None or quiz['is_deleted']:
+            raise Http404
+        current = session.get(quiz, request.user.id)
+        if current is None:
+            return Response(
+                {'message': _('You have not joined this quiz.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        now = timezone.now()
+        if now < quiz['start']:
+            return Response(
+                {'message': _('Quiz has not started yet.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if session.is_late(current, now):
+            return Response(
+                {'message': _('Time is up for this quiz.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        quiz_id = quiz['id']
 
-        for answer in answers:
-            q_id = answer.get("question_id")
-            user_answer = answer.get("answer")
+        user_answers = {}
+        try:
+            for answer in answers:
+                user_answers[int(answer.get("question_id"))] = str(answer.get("answer") or '')
+        except (AttributeError, TypeError, ValueError):
+            return Response(
+                {'message': _('Question id is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            instance = Question.objects.filter(id=q_id).first()
+        questions = Question.objects.filter(quiz__id=quiz_id).in_bulk(list(user_answers))
+        if len(questions) != len(user_answers):
+            return Response(
+                {'message': _('This question does not belong to this quiz.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        answers_arr = []
+        grade = 0
+        for q_id, user_answer in user_answers.items():
+            instance = questions[q_id]
             point = 0
             is_correct = None
 
@@ -114,6 +171,7 @@ class ParticipantAnswerQuestionsAPIView(APIView):
                     is_correct = False
                     point = 0
 
+            grade = grade + point
             answers_arr.append(
                 ParticipantAnswer(
                     participant_id=request.user.id,
@@ -125,23 +183,39 @@ class ParticipantAnswerQuestionsAPIView(APIView):
                 )
             )
 
-        ParticipantAnswer.objects.bulk_create(answers_arr)
-        obj, created = QuizParticipant.objects.get_or_create(
-            participant_id=request.user.id,
-            quiz_id=quiz_id,
-        )
-        obj.finished_in = finished_in
-        obj.completion = completion
-
-        for a in answers_arr:
-            obj.grade = obj.grade + a.point
-
-        obj.save()
+        finished_in = session.finished_in(current, now)
+        completion = session.completion(quiz, len(answers_arr))
+        # finished_in is set by the first submission, a participant submits once
+        participant = QuizParticipant.objects.filter(participant_id=request.user.id, quiz_id=quiz_id)
+        try:
+            with transaction.atomic():
+                updated = participant \
+                    .filter(finished_in='') \
+                    .update(grade=F('grade') + grade, finished_in=finished_in, completion=completion, draft='')
+                if not updated:
+                    if participant.exists():
+                        return self.already_submitted()
+                    QuizParticipant.objects.create(
+                        participant_id=request.user.id,
+                        quiz_id=quiz_id,
+                        grade=grade,
+                        finished_in=finished_in,
+                        completion=completion,
+                        started=current.started
+                    )
+                ParticipantAnswer.objects.bulk_create(answers_arr)
+                # bulk_create sends no post_save for the stats receiver
+                analytics.invalidate(quiz_id)
+        except IntegrityError:
+            # answers given before finished_in was kept
+            return self.already_submitted()
 
         return Response()
 
 class GradeParticipantPaperAPIView(APIView):
-
+    """
+    Grade the answers of a participant for a quiz and recompute the grade.
+    """
     def post(self, request, *args, **kwargs):
         if not request.user.is_instructor:
             return Response(
@@ -158,60 +232,68 @@ class GradeParticipantPaperAPIView(APIView):
         participant_id = request.data.get("participant_id")
         answers = request.data.get("answers")
 
-        errors = []
+        try:
+            participant_id = int(participant_id)
+        except (TypeError, ValueError):
+            return Response(
+                [grade_error("Participant is not valid.", 0, 0, 0)],
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        with transaction.atomic():
-            for answer in answers:
-                obj = None
-                a_point = answer.get("point")
-                qs = ParticipantAnswer.objects.filter(
-                    participant_id=participant_id,
-                    quiz_id=quiz_id,
-                    question_id=answer.get("question_id"),
+        errors = grade_papers(quiz_id, {participant_id: answers or []})
+        if len(errors) == 0:
+            email = User.objects.filter(id=participant_id).values_list('email', flat=True).first()
+            if email:
+                OutgoingMail.objects.queue(
+                    "A QUIZ HAS BEEN GRADED",
+                    "Hello from QuizMaker. The quiz you have added was graded.",
+                    'se301quizmaker@gmail.com',
+                    [email],
                 )
-                if qs.exists():
-                    obj = qs.first()
-
-                if obj and a_point is not None:
-                    if obj.question.point >= a_point:
-                        obj.point = a_point
-                        obj.is_validated = True
-                        obj.save()
-                    else:
-                        errors.append(
-                            {
-                                'message': "Question point is greater than given point.",
-                                'question_id': obj.question.id,
-                                'question_point': obj.question.point,
-                                'point': a_point,
-                            }
-                        )
-                else:
-                    obj.point = None
-                    obj.is_validated = False
-                    obj.save()
+            return Response()
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+class GradeParticipantPapersAPIView(APIView):
+    """
+    Grade the papers of many participants of a quiz in one request. The
+    body holds `quiz_id` and `papers`, a mapping of participant ids to the
+    same answer lists GradeParticipantPaperAPIView takes. Nothing is saved
+    if any point is not valid.
+    """
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_instructor:
+            return Response(
+                [grade_error("Only instructors can grade a quiz paper.", 0, 0, 0)],
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        quiz_id = request.data.get("quiz_id")
+        papers = request.data.get("papers")
+
+        if not Quiz.objects.filter(id=quiz_id).filter(owner=request.user).exists():
+            return Response(
+                [grade_error("Quiz is not found.", 0, 0, 0)],
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            papers = {int(participant_id): answers or [] for participant_id, answers in papers.items()}
+        except (AttributeError, TypeError, ValueError):
+            return Response(
+                [grade_error("Participant is not valid.", 0, 0, 0)],
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        errors = grade_papers(quiz_id, papers)
         if len(errors) == 0:
-            user_qs = User.objects.filter(id=participant_id)
-            if user_qs.exists():
-                user = user_qs.first()
-                send_mail(
-        		    "A QUIZ HAS BEEN GRADED",
-        		    "Hello from QuizMaker. The quiz you have added was graded.",
-        		    'se301quizmaker@gmail.com',
-        		    [user.email],
-        		    fail_silently=False,
-        		)
-
-            overall_grade = 0
-            answer_qs = ParticipantAnswer.objects.filter(quiz_id=quiz_id, participant_id=participant_id)
-            if answer_qs.exists():
-                for a in answer_qs:
-                    if a.point:
-                        overall_grade = overall_grade + a.point
-
-            p, created = QuizParticipant.objects.get_or_create(quiz_id=quiz_id, participant_id=participant_id)
-            p.grade = overall_grade
-            p.save()
+            emails = User.objects.filter(id__in=list(papers)).values_list('email', flat=True)
+            OutgoingMail.objects.queue_many([
+                (
+                    "A QUIZ HAS BEEN GRADED",
+                    "Hello from QuizMaker. The quiz you have added was graded.",
+                    'se301quizmaker@gmail.com',
+                    [email],
+                ) for email in emails
+            ])
             return Response()
         return Response(errors, status=status.HTTP_400_BAD_REQUEST)
@@ -51,3 +51,20 @@ class ParticipantAnswer(models.Model):
 
     class Meta:
         unique_together = ('quiz', 'question', 'participant')
+        indexes = [
+            # answer sheets of a participant
+            models.Index(fields=['quiz', 'participant'], name='answer_quiz_participant_idx'),
+        ]
+
+    def grade_automatically(self):
+        """
+        Grade the answer of a multiple choice or true/false question against
+        the answer of the question. Text answers are graded by hand and left
+        as they are, False is returned for them.
+        """
+        if self.question.question_type == "text":
+            return False
+        self.is_validated = True
+        self.is_correct = (self.answer or '').lower() == self.question.answer.lower()
+        self.point = self.question.point if self.is_correct else 0
+        return True
@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, DecimalField
+from django.db.models.functions import Coalesce
+
+from question.models import ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant
+from quiz import analytics
+
+def grade_error(message, question_id, question_point, point, participant_id=0):
+    return {
+        'message': message,
+        'participant_id': participant_id,
+        'question_id': question_id,
+        'question_point': question_point,
+        'point': point,
+    }
+
+def grade_papers(quiz_id, papers):
+    """
+    Grade papers of a quiz. `papers` maps participant ids to lists of
+    {'question_id': .., 'point': ..}; a point of None resets the answer to
+    not validated. Answers of multiple choice and true/false questions keep
+    their automatic grade, as answer_pre_save_receiver does for single
+    answers. The answers are loaded with one query and checked in memory.
+    If any point is not valid a list of errors is returned and nothing is
+    written, otherwise the answers are saved with one bulk update, the
+    grades of the participants are recomputed and materialized stats of the
+    quiz are dropped.
+    """
+    answers = ParticipantAnswer.objects \
+        .filter(quiz_id=quiz_id, participant_id__in=list(papers)) \
+        .select_related('question')
+    answers = {(a.participant_id, a.question_id): a for a in answers}
+
+    errors = []
+    changed = []
+    for participant_id, paper in papers.items():
+        for answer in paper:
+            try:
+                question_id = int(answer.get("question_id"))
+            except (AttributeError, TypeError, ValueError):
+                question_id = answer.get("question_id") if isinstance(answer, dict) else None
+                errors.append(grade_error("Question id is not valid.", question_id, 0, 0, participant_id))
+                continue
+            point = answer.get("point")
+            obj = answers.get((participant_id, question_id))
+
+            if obj is None:
+                errors.append(grade_error("Answer is not found.", question_id, 0, point, participant_id))
+            elif point is None:
+                obj.point = None
+                obj.is_validated = False
+                changed.append(obj)
+            elif isinstance(point, bool) or not isinstance(point, int) or point < 0:
+                errors.append(grade_error("Point is not valid.", question_id, obj.question.point, point, participant_id))
+            elif obj.question.point >= point:
+                obj.point = point
+                obj.is_validated = True
+                changed.append(obj)
+            else:
+                errors.append(grade_error(
+                    "Question point is greater than given point.",
+                    question_id,
+                    obj.question.point,
+                    point,
+                    participant_id
+                ))
+
+    if errors:
+        return errors
+
+    # bulk_update sends no pre_save
+    for obj in changed:
+        obj.grade_automatically()
+
+    with transaction.atomic():
+        if changed:
+            ParticipantAnswer.objects.bulk_update(changed, ['point', 'is_validated', 'is_correct'])
+        update_grades(quiz_id, list(papers))
+        analytics.invalidate(quiz_id)
+    return errors
+
+def update_grades(quiz_id, participant_ids):
+    """
+    Set the grade of the participants to the sum of their answer points
+    with one UPDATE statement.
+    """
+    existing = QuizParticipant.objects \
+        .filter(quiz_id=quiz_id, participant_id__in=participant_ids) \
+        .values_list('participant_id', flat=True)
+    missing = set(participant_ids) - set(existing)
+    if missing:
+        QuizParticipant.objects.bulk_create([
+            QuizParticipant(quiz_id=quiz_id, participant_id=participant_id)
+            for participant_id in missing
+        ], ignore_conflicts=True)
+        Quiz.objects.filter(id=quiz_id).refresh_counts()
+
+    total = ParticipantAnswer.objects \
+        .filter(quiz_id=OuterRef('quiz_id'), participant_id=OuterRef('participant_id')) \
+        .order_by() \
+        .values('participant_id') \
+        .annotate(total=Sum('point')) \
+        .values('total')
+    output_field = DecimalField(max_digits=100, decimal_places=2)
+    QuizParticipant.objects \
+        .filter(quiz_id=quiz_id, participant_id__in=participant_ids) \
+        .update(grade=Coalesce(Subquery(total, output_field=output_field), 0, output_field=output_field))
@@ -4,17 +4,15 @@ from django.shortcuts import get_object_or_404
 from question.models import ParticipantAnswer
 
 from quiz.models import QuizParticipant
+from quiz import analytics
 
 @receiver(pre_save, sender=ParticipantAnswer)
 def answer_pre_save_receiver(sender, instance, *args, **kwargs):
-    if instance.question.question_type != "text":
-        instance.is_validated = True
-        if instance.answer.lower() == instance.question.answer.lower():
-            instance.is_correct = True
-            instance.point = instance.question.point
-        else:
-            instance.is_correct = False
-            instance.point = 0
+    instance.grade_automatically()
+
+@receiver(post_save, sender=ParticipantAnswer)
+def answer_stats_receiver(sender, instance, created, *args, **kwargs):
+    analytics.invalidate(instance.quiz_id)
 
 # @receiver(post_save, sender=ParticipantAnswer)
 # def answer_post_save_receiver(sender, instance, created, *args, **kwargs):
@@ -1,3 +1,223 @@
+from datetime import timedelta
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User, Student, Instructor
+from course.models import Course
+from notification.models import OutgoingMail
+from question.models import Question, ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant, QuizStats, QuestionStats
+from quiz import analytics, session, snapshot
 
 # Create your tests here.
+class AnswerSubmissionLoadTests(TestCase):
+    """
+    Every submission costs the same number of queries however many answers
+    it holds, and many submitters in a row keep that cost.
+    """
+    submitter_count = 500
+    question_count = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', 'owner@quizmaker.com', 'password', user_type='S')
+        cls.quiz = Quiz.objects.create(owner=owner, name='Quiz', end=timezone.now() + timedelta(hours=1))
+        cls.questions = Question.objects.bulk_create([
+            Question(question='Question {0}'.format(i), answer='A', point=5)
+            for i in range(cls.question_count)
+        ])
+        cls.questions = list(Question.objects.all())
+        cls.quiz.questions.add(*cls.questions)
+
+        User.objects.bulk_create([
+            User(username='student{0}'.format(i), email='student{0}@quizmaker.com'.format(i), user_type='S')
+            for i in range(cls.submitter_count)
+        ])
+        cls.students = list(User.objects.filter(username__startswith='student'))
+        Student.objects.bulk_create([Student(user=user, student_id=user.username) for user in cls.students])
+        QuizParticipant.objects.bulk_create([
+            QuizParticipant(quiz=cls.quiz, participant=user, started=timezone.now()) for user in cls.students
+        ])
+
+    def setUp(self):
+        # the students joined when the quiz started, which cached their sessions
+        cache.clear()
+        quiz = snapshot.get(self.quiz.id)
+        for user in self.students:
+            session.start(quiz, user.id, timezone.now())
+
+    def submit(self, user, answers):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/question/answers/create', {
+            'quiz_id': self.quiz.id,
+            'finished_in': '10:00',
+            'completion': 100,
+            'answers': answers,
+        }, format='json')
+
+    def test_submissions(self):
+        for i, user in enumerate(self.students):
+            answers = [
+                {'question_id': question.id, 'answer': 'a' if i % 2 else 'B'}
+                for question in self.questions
+            ]
+            # with dropping materialized stats
+            with self.assertNumQueries(6):
+                response = self.submit(user, answers)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            ParticipantAnswer.objects.count(),
+            self.submitter_count * self.question_count
+        )
+        grades = QuizParticipant.objects.values_list('grade', flat=True)
+        self.assertEqual(sorted(set(grades)), [0, 5 * self.question_count])
+
+    def test_answer_not_a_string(self):
+        response = self.submit(self.students[0], [{'question_id': self.questions[0].id, 'answer': 1}])
+        self.assertEqual(response.status_code, 200)
+        answer = ParticipantAnswer.objects.get()
+        self.assertEqual((answer.answer, answer.is_correct, answer.point), ('1', False, 0))
+
+    def test_foreign_question(self):
+        other = Question.objects.create(question='Other', answer='A', point=5)
+        response = self.submit(self.students[0], [{'question_id': other.id, 'answer': 'A'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ParticipantAnswer.objects.exists())
+
+    def test_stats_invalidated(self):
+        analytics.materialize(self.quiz)
+        answers = [{'question_id': question.id, 'answer': 'A'} for question in self.questions[:2]]
+        self.assertEqual(self.submit(self.students[0], answers).status_code, 200)
+        self.assertFalse(QuizStats.objects.filter(quiz=self.quiz).exists())
+
+        stats = analytics.materialize(self.quiz)
+        self.assertEqual(stats.participant_count, self.submitter_count)
+        self.assertEqual(analytics.load_grades(stats.grades)[-1], (10, 1))
+        rows = QuestionStats.objects.filter(quiz=self.quiz).order_by('question_id')
+        self.assertEqual(
+            [(row.question_id, row.answer_count, row.correct_count) for row in rows],
+            [(question.id, 1, 1) for question in self.questions[:2]]
+        )
+
+class GradePapersTests(TestCase):
+    """
+    Instructors grade text answers one paper or many papers at a time,
+    nothing is saved if any point is not valid.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        cls.quiz = Quiz.objects.create(owner=cls.instructor, course=course, name='Quiz', end=timezone.now() - timedelta(hours=1))
+        cls.questions = [
+            Question.objects.create(question='Question {0}'.format(i), question_type='text', point=10)
+            for i in range(2)
+        ]
+        cls.quiz.questions.add(*cls.questions)
+        cls.students = []
+        for i in range(2):
+            user = User.objects.create_user('student{0}'.format(i), 'student{0}@quizmaker.com'.format(i), 'password', user_type='S')
+            Student.objects.create(user=user, student_id=str(i))
+            cls.students.append(user)
+            QuizParticipant.objects.create(quiz=cls.quiz, participant=user)
+            ParticipantAnswer.objects.bulk_create([
+                ParticipantAnswer(quiz=cls.quiz, question=question, participant=user, answer='Answer')
+                for question in cls.questions
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def grade(self, participant, answers):
+        return self.client.post('/api/question/answers/validate', {
+            'quiz_id': self.quiz.id,
+            'participant_id': participant.id,
+            'answers': answers,
+        }, format='json')
+
+    def grades(self):
+        return dict(QuizParticipant.objects.filter(quiz=self.quiz).values_list('participant_id', 'grade'))
+
+    def test_grade_paper(self):
+        response = self.grade(self.students[0], [
+            {'question_id': self.questions[0].id, 'point': 10},
+            {'question_id': str(self.questions[1].id), 'point': 4},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.grades(), {self.students[0].id: 14, self.students[1].id: 0})
+        self.assertEqual(ParticipantAnswer.objects.filter(is_validated=True).count(), 2)
+        self.assertEqual(OutgoingMail.objects.count(), 1)
+
+    def test_invalid_points(self):
+        for answer in (
+            {'question_id': self.questions[0].id, 'point': 11},
+            {'question_id': self.questions[0].id, 'point': -1},
+            {'question_id': self.questions[0].id, 'point': True},
+            {'question_id': 'x', 'point': 1},
+            {'question_id': 0, 'point': 1},
+        ):
+            response = self.grade(self.students[0], [{'question_id': self.questions[1].id, 'point': 5}, answer])
+            self.assertEqual(response.status_code, 400, answer)
+            self.assertEqual(len(response.data), 1, answer)
+        self.assertFalse(ParticipantAnswer.objects.filter(is_validated=True).exists())
+        self.assertEqual(self.grades(), {self.students[0].id: 0, self.students[1].id: 0})
+
+    def test_grade_papers(self):
+        response = self.client.post('/api/question/answers/validate/bulk', {
+            'quiz_id': self.quiz.id,
+            'papers': {
+                str(self.students[0].id): [{'question_id': self.questions[0].id, 'point': 7}],
+                str(self.students[1].id): [
+                    {'question_id': self.questions[0].id, 'point': 10},
+                    {'question_id': self.questions[1].id, 'point': 10},
+                ],
+            },
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.grades(), {self.students[0].id: 7, self.students[1].id: 20})
+        self.assertEqual(OutgoingMail.objects.count(), 2)
+
+    def test_grade_papers_all_or_nothing(self):
+        # the quiz and every answer of the papers are read once, nothing written
+        with self.assertNumQueries(2):
+            response = self.client.post('/api/question/answers/validate/bulk', {
+                'quiz_id': self.quiz.id,
+                'papers': {
+                    str(self.students[0].id): [{'question_id': self.questions[0].id, 'point': 7}],
+                    str(self.students[1].id): [{'question_id': self.questions[0].id, 'point': 70}],
+                },
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['participant_id'] for error in response.data], [self.students[1].id])
+        self.assertFalse(ParticipantAnswer.objects.filter(is_validated=True).exists())
+        self.assertFalse(OutgoingMail.objects.exists())
+
+    def test_grade_papers_of_other_owner(self):
+        other = User.objects.create_user('other', 'other@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=other, is_approved=True)
+        self.client.force_authenticate(other)
+        response = self.client.post('/api/question/answers/validate/bulk', {
+            'quiz_id': self.quiz.id,
+            'papers': {str(self.students[0].id): [{'question_id': self.questions[0].id, 'point': 7}]},
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_grade_papers_keeps_automatic_grade(self):
+        question = Question.objects.create(question='Choice', question_type='multichoice', answer='A', point=10)
+        self.quiz.questions.add(question)
+        ParticipantAnswer.objects.create(quiz=self.quiz, question=question, participant=self.students[0], answer='B')
+        for point in (10, None):
+            response = self.client.post('/api/question/answers/validate/bulk', {
+                'quiz_id': self.quiz.id,
+                'papers': {str(self.students[0].id): [{'question_id': question.id, 'point': point}]},
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            answer = ParticipantAnswer.objects.get(question=question)
+            self.assertEqual((answer.point, answer.is_correct, answer.is_validated), (0, False, True))
+        self.assertEqual(self.grades()[self.students[0].id], 0)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from quiz.models import Quiz, QuizParticipant
+from quiz.models import Quiz, QuizParticipant, QuizStats, QuestionStats
 
 # Register your models here.
 @admin.register(Quiz)
@@ -10,3 +10,11 @@ class QuizAdmin(admin.ModelAdmin):
 class QuizParticipantAdmin(admin.ModelAdmin):
     list_display  = ('quiz', 'participant', 'grade', 'finished_in')
     list_filter = ('grade',)
+
+@admin.register(QuizStats)
+class QuizStatsAdmin(admin.ModelAdmin):
+    list_display  = ('quiz', 'participant_count', 'max_points', 'updated')
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    list_display  = ('quiz', 'question', 'answer_count', 'graded_count', 'correct_count', 'point_sum')
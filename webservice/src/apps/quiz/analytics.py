@@ -0,0 +1,202 @@
+import json
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from question.models import ParticipantAnswer
+from quiz.models import QuizParticipant, QuizStats, QuestionStats
+
+PERCENTILES = (10, 25, 50, 75, 90)
+DEFAULT_BINS = 10
+MAX_BINS = 100
+CENT = Decimal('0.01')
+
+# automatically graded answers know if they are correct, text answers are
+# graded by an instructor and correct when they got the full point
+GRADED = Q(is_correct__isnull=False) | Q(is_validated=True)
+CORRECT = Q(is_correct=True) | Q(is_correct__isnull=True, is_validated=True, point=F('question__point'))
+
+QUESTION_TOTALS = ('answer_count', 'graded_count', 'correct_count', 'point_sum')
+
+def grade_counts(quiz_id):
+    """
+    Return (grade, number of participants) pairs of the quiz ordered by
+    grade with one grouped query.
+    """
+    rows = QuizParticipant.objects \
+        .filter(quiz_id=quiz_id) \
+        .order_by('grade') \
+        .values('grade') \
+        .annotate(count=Count('id')) \
+        .values_list('grade', 'count')
+    return [(Decimal(grade), count) for grade, count in rows]
+
+def question_totals(quiz_id, question_ids=None):
+    """
+    Return the answer, graded, correct counts and the point sum of the
+    questions of the quiz, by question id, with one grouped query.
+    """
+    answers = ParticipantAnswer.objects.filter(quiz_id=quiz_id)
+    if question_ids is not None:
+        answers = answers.filter(question_id__in=question_ids)
+    rows = answers \
+        .order_by() \
+        .values('question_id') \
+        .annotate(
+            answer_count=Count('id'),
+            graded_count=Count('id', filter=GRADED),
+            correct_count=Count('id', filter=CORRECT),
+            point_sum=Coalesce(Sum('point'), 0),
+        )
+    return {row.pop('question_id'): row for row in rows}
+
+def dump_grades(grades):
+    return json.dumps([[str(grade), count] for grade, count in grades])
+
+def load_grades(grades):
+    return [(Decimal(grade), count) for grade, count in json.loads(grades)]
+
+def materialize(quiz):
+    """
+    Write the grade distribution and the question totals of the quiz into
+    QuizStats and QuestionStats.
+    """
+    grades = grade_counts(quiz.id)
+    totals = question_totals(quiz.id)
+    max_points = quiz.questions.aggregate(total=Sum('point'))['total'] or 0
+    with transaction.atomic():
+        QuestionStats.objects.filter(quiz_id=quiz.id).delete()
+        # rows written by a concurrent read of the same quiz are kept
+        QuestionStats.objects.bulk_create([
+            QuestionStats(quiz_id=quiz.id, question_id=question_id, **row)
+            for question_id, row in totals.items()
+        ], ignore_conflicts=True)
+        stats, created = QuizStats.objects.update_or_create(quiz_id=quiz.id, defaults={
+            'participant_count': sum(count for grade, count in grades),
+            'max_points': max_points,
+            'grades': dump_grades(grades),
+            'updated': timezone.now(),
+        })
+    return stats
+
+def invalidate(quiz_id):
+    """
+    Drop the materialized stats of the quiz after answers were submitted or
+    graded, the next read of its analytics or `materialize_quiz_stats`
+    writes them again. This is a single DELETE, so submissions and grading
+    of the same quiz do not collide on the rows of the stats.
+    """
+    QuizStats.objects.filter(quiz_id=quiz_id).delete()
+
+def percentile(grades, total, p):
+    """
+    Linearly interpolated percentile of the grades given as ordered
+    (grade, count) pairs with `total` grades in all.
+    """
+    position = Decimal(total - 1) * p / 100
+    lower = int(position)
+    values = []
+    seen = 0
+    for grade, count in grades:
+        while len(values) < 2 and lower + len(values) < seen + count:
+            values.append(grade)
+        if len(values) == 2:
+            break
+        seen += count
+    if len(values) == 1:
+        return values[0]
+    return values[0] + (values[1] - values[0]) * (position - lower)
+
+def histogram(grades, max_points, bins):
+    """
+    Count the grades in `bins` equal ranges from 0 to max_points, the last
+    range includes max_points.
+    """
+    top = max([max_points] + [grade for grade, count in grades] + [1])
+    width = Decimal(top) / bins
+    counts = [0] * bins
+    for grade, count in grades:
+        counts[min(int(grade / width), bins - 1)] += count
+    return [
+        {
+            'from': (width * i).quantize(CENT),
+            'to': (width * (i + 1)).quantize(CENT),
+            'count': count,
+        } for i, count in enumerate(counts)
+    ]
+
+def distribution(grades, max_points, bins):
+    total = sum(count for grade, count in grades)
+    if not total:
+        return {
+            'participant_count': 0,
+            'mean': None,
+            'median': None,
+            'percentiles': {'p{0}'.format(p): None for p in PERCENTILES},
+            'histogram': histogram(grades, max_points, bins),
+        }
+    mean = sum(grade * count for grade, count in grades) / total
+    return {
+        'participant_count': total,
+        'mean': mean.quantize(CENT),
+        'median': percentile(grades, total, 50).quantize(CENT),
+        'percentiles': {
+            'p{0}'.format(p): percentile(grades, total, p).quantize(CENT) for p in PERCENTILES
+        },
+        'histogram': histogram(grades, max_points, bins),
+    }
+
+def quiz_analytics(quiz, bins=DEFAULT_BINS):
+    """
+    Return the grade distribution and the question difficulty of the quiz.
+    Stats of an ended quiz are read from QuizStats and QuestionStats, and
+    materialized there the first time they are asked for; a running quiz is
+    computed from the answers.
+    """
+    questions = list(
+        quiz.questions
+            .order_by('question_number', 'id')
+            .values('id', 'question_number', 'question', 'question_type', 'point')
+    )
+
+    if quiz.end <= timezone.now():
+        stats = QuizStats.objects.filter(quiz_id=quiz.id).first() or materialize(quiz)
+        grades = load_grades(stats.grades)
+        max_points = stats.max_points
+        totals = {
+            row.pop('question_id'): row
+            for row in QuestionStats.objects.filter(quiz_id=quiz.id).values('question_id', *QUESTION_TOTALS)
+        }
+    else:
+        grades = grade_counts(quiz.id)
+        max_points = sum(question['point'] for question in questions)
+        totals = question_totals(quiz.id)
+
+    data = distribution(grades, max_points, bins)
+    data['quiz_id'] = quiz.id
+    data['max_points'] = max_points
+    data['questions'] = []
+    for question in questions:
+        row = totals.get(question['id']) or dict.fromkeys(QUESTION_TOTALS, 0)
+        data['questions'].append({
+            'question_id': question['id'],
+            'question_number': question['question_number'],
+            'question': question['question'],
+            'question_type': question['question_type'],
+            'point': question['point'],
+            'answer_count': row['answer_count'],
+            'graded_count': row['graded_count'],
+            'correct_count': row['correct_count'],
+            'correct_rate': (
+                (Decimal(row['correct_count']) / row['graded_count']).quantize(CENT)
+                if row['graded_count'] else None
+            ),
+            'average_points': (
+                (Decimal(row['point_sum']) / row['answer_count']).quantize(CENT)
+                if row['answer_count'] else None
+            ),
+        })
+    return data
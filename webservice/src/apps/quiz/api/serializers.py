@@ -5,16 +5,32 @@ from django.utils.translation import gettext_lazy as _
 
 from account.api.serializers import UserSerializer
 from account.api.serializers import ParticipantSerializer
-from question.api.serializers import QuestionSerializer
+from question.api.serializers import QuestionSerializer, QuestionWithoutAnswerSerializer
 from quiz.models import Quiz, QuizParticipant
-from question.models import ParticipantAnswer
+from question.models import Question, ParticipantAnswer
 
 User = get_user_model()
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizOwnerCourseSerializer(serializers.ModelSerializer):
+    """
+    Base of the quiz serializers which show the owner and course names.
+    """
     owner_id = serializers.SerializerMethodField()
     owner_name = serializers.SerializerMethodField()
     course_name = serializers.SerializerMethodField()
+
+    def get_owner_id(self, instance):
+        return instance.owner.id
+
+    def get_owner_name(self, instance):
+        return instance.owner.username
+
+    def get_course_name(self, instance):
+        if instance.course:
+            return instance.course.name
+        return None
+
+class QuizSerializer(QuizOwnerCourseSerializer):
     participants = ParticipantSerializer(many=True)
     questions = QuestionSerializer(many=True)
 
@@ -30,6 +46,7 @@ class QuizSerializer(serializers.ModelSerializer):
             'description',
             'start',
             'end',
+            'duration',
             'be_graded',
             'percentage',
             'is_private',
@@ -40,41 +57,55 @@ class QuizSerializer(serializers.ModelSerializer):
             'percentage': {'max_digits': 100, 'decimal_places': 2}
         }
 
-    def get_owner_id(self, instance):
-        return instance.owner.id
-
-    def get_owner_name(self, instance):
-        return instance.owner.username
-
-    def get_course_name(self, instance):
-        if instance.course:
-            return instance.course.name
-        return None
-
-class QuizCreateUpdateSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField(read_only=True)
+class QuizListSerializer(QuizSerializer):
+    """
+    A quiz of the lists other than the owner's, its questions come without
+    their answers.
+    """
+    questions = QuestionWithoutAnswerSerializer(many=True)
 
+class QuizSummarySerializer(QuizOwnerCourseSerializer):
+    """
+    Quiz metadata with question and participant counts instead of the
+    questions and participants themselves.
+    """
     class Meta:
         model = Quiz
         fields = (
             'id',
+            'owner_id',
+            'owner_name',
+            'course',
+            'course_name',
             'name',
             'description',
-            'course',
-            'participants',
-            'questions',
             'start',
             'end',
             'be_graded',
-            'percentage'
+            'percentage',
+            'is_private',
+            'question_count',
+            'participant_count',
         )
 
-class QuizAppendSerializer(serializers.ModelSerializer):
+class QuizCreateUpdateSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Quiz
         fields = (
             'id',
+            'name',
+            'description',
+            'course',
+            'participants',
+            'questions',
+            'start',
+            'end',
+            'duration',
+            'be_graded',
+            'percentage',
+            'auto_enroll',
         )
 
 class QuizParticipantAnswerSerializer(serializers.ModelSerializer):
@@ -98,3 +129,27 @@ class QuizParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizParticipant
         fields = '__all__'
+
+class QuizRowSerializer(serializers.Serializer):
+    """
+    One row of an imported quiz file. Rows with the same `quiz` key belong to
+    one quiz, the quiz fields are read from the first of them and every row
+    with a `question` adds a question to it.
+    """
+    quiz            = serializers.CharField(max_length=120)
+    name            = serializers.CharField(max_length=50, required=False)
+    description     = serializers.CharField(max_length=255, required=False)
+    start           = serializers.DateTimeField(required=False)
+    end             = serializers.DateTimeField(required=False)
+    be_graded       = serializers.BooleanField(required=False)
+    percentage      = serializers.DecimalField(max_digits=100, decimal_places=2,
+                                               min_value=0, max_value=100, required=False)
+    question_number = serializers.IntegerField(min_value=0, required=False)
+    question_type   = serializers.ChoiceField(choices=Question.QUESTIONTYPE_CHOICES, required=False)
+    question        = serializers.CharField(required=False)
+    point           = serializers.IntegerField(min_value=0, required=False)
+    answer          = serializers.CharField(required=False)
+    A               = serializers.CharField(required=False)
+    B               = serializers.CharField(required=False)
+    C               = serializers.CharField(required=False)
+    D               = serializers.CharField(required=False)
@@ -11,10 +11,14 @@ from .views import (
     QuizWaitingListAPIView,
     QuizParticipantsListAPIView,
     QuizAppendView,
+    QuizSessionAPIView,
     QuizParticipantAnswerAPIView,
     QuizOwnerAnswerAPIView,
     QuizParticipantStatAPIView,
     QuizOwnerGetAnswersAPIView,
+    QuizExportAPIView,
+    QuizImportAPIView,
+    QuizAnalyticsAPIView,
 )
 
 app_name = "api_quizzes"
@@ -30,8 +34,12 @@ urlpatterns = [
     path('participator/waiting', QuizWaitingListAPIView.as_view()),
     path('participator/answers', QuizParticipantAnswerAPIView.as_view()),
     path('participator/stats', QuizParticipantStatAPIView.as_view()),
+    path('export/<file_format>', QuizExportAPIView.as_view()),
+    path('import/<file_format>', QuizImportAPIView.as_view()),
+    path('analytics/<pk>', QuizAnalyticsAPIView.as_view()),
     path('<pk>', QuizRetrieveAPIView.as_view()),
     path('update/<pk>', QuizUpdateAPIView.as_view()),
     path('delete/<pk>', QuizDeleteAPIView.as_view()),
     path('append/<pk>', QuizAppendView.as_view()),
+    path('session/<pk>', QuizSessionAPIView.as_view()),
 ]
@@ -1,6 +1,9 @@
+import codecs
+import csv
+
 from django.contrib.auth import get_user_model
+from django.http import Http404
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Count
 from datetime import datetime
 from django.utils import timezone
 from rest_framework import status
@@ -17,69 +20,141 @@ from rest_framework.generics import (
 
 from account.api.permissions import IsAuthenticated
 from course.models import Course
-from question.models import Question, ParticipantAnswer
+from question.models import Question
 from quiz.models import Quiz, QuizParticipant
+from quiz import analytics, feed, session, snapshot, timeline, transfer
+from quiz.services import answer_sheet, join, quiz_answers, parse_ids, parse_user_ids
 from account.api.serializers import UserSerializer
+from utils.streaming import streaming_response
 from quiz.api.serializers import (
     QuizSerializer,
+    QuizListSerializer,
+    QuizSummarySerializer,
     QuizCreateUpdateSerializer,
-    QuizAppendSerializer,
     QuizParticipantAnswerSerializer,
     QuizParticipantSerializer,
 )
 
 User = get_user_model()
 
-class QuizEndListAPIView(ListAPIView):
+class QuizListMixin(object):
+    """
+    Serialize quizzes with their questions, without the answers, and
+    participants, or as summaries with question_count and participant_count
+    if the `summary` query parameter is given. Views implement
+    `get_quiz_queryset`.
+    """
+    serializer_class = QuizListSerializer
+    summary_serializer_class = QuizSummarySerializer
+    page_size = 50
+
+    def is_summary(self):
+        return self.request.GET.get("summary") in ('1', 'true', 'True')
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return self.summary_serializer_class
+        return self.serializer_class
+
+    def get_queryset(self):
+        queryset = self.get_quiz_queryset()
+        if self.is_summary():
+            return queryset.with_counts()
+        return queryset.with_relations()
+
+class QuizTimelineMixin(object):
+    """
+    Cache the pages of the request user's timeline and answer conditional
+    requests. The ETag changes only when the user's participations change
+    or the next quiz of the user ends, a matching If-None-Match gets 304.
+    """
+    timeline_name = None
+
+    def list(self, request, *args, **kwargs):
+        page = timeline.get_page(self.timeline_name, request)
+        if page is not None:
+            data, headers, etag = page
+        else:
+            response = super(QuizTimelineMixin, self).list(request, *args, **kwargs)
+            headers = {'Link': response['Link']} if response.has_header('Link') else {}
+            data = response.data
+            etag = timeline.set_page(self.timeline_name, request, data, headers)
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        etags = [tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')]
+        if etag in etags or if_none_match.strip() == '*':
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, headers=headers)
+        response['ETag'] = etag
+        return response
+
+class QuizEndListAPIView(QuizTimelineMixin, QuizListMixin, ListAPIView):
     """
     Return a list of ended quizzes.
     """
     queryset = Quiz.objects.all().filter(is_deleted=False)
-    serializer_class = QuizSerializer
+    timeline_name = 'end'
 
-    def get_queryset(self):
+    def get_quiz_queryset(self):
         return Quiz.objects.filter(participants__id=self.request.user.id).filter(end__lte=timezone.now()).filter(is_deleted=False).order_by('end')
 
-class QuizWaitingListAPIView(ListAPIView):
+class QuizWaitingListAPIView(QuizTimelineMixin, QuizListMixin, ListAPIView):
     """
     Return a list of waiting quizzes.
     """
     queryset = Quiz.objects.all().filter(is_deleted=False)
-    serializer_class = QuizSerializer
+    timeline_name = 'waiting'
 
-    def get_queryset(self):
+    def get_quiz_queryset(self):
         return Quiz.objects.filter(participants__id=self.request.user.id).filter(end__gt=timezone.now()).filter(is_deleted=False).order_by('end')
 
-class QuizOwnerListAPIView(ListAPIView):
+class QuizOwnerListAPIView(QuizListMixin, ListAPIView):
     """
-    Return a list of quizzes that was created by request user.
+    Return a list of quizzes that was created by request user, with the
+    answers of their questions.
     """
     queryset = Quiz.objects.all().filter(is_deleted=False)
     serializer_class = QuizSerializer
 
-    def get_queryset(self):
-        return Quiz.objects.filter(owner=self.request.user).filter(is_deleted=False).order_by('-end').all()
+    def get_quiz_queryset(self):
+        return Quiz.objects.filter(owner=self.request.user).filter(is_deleted=False).order_by('-end')
 
 class QuizRetrieveAPIView(RetrieveAPIView):
     """
     Return a quiz with given id.
     """
-    queryset = Quiz.objects.all()
+    queryset = Quiz.objects.all().with_relations()
     serializer_class = QuizSerializer
 
-class QuizListAPIView(ListAPIView):
+class QuizListAPIView(QuizListMixin, ListAPIView):
     """
     Return a list of quizzes either belongs a course or are public.
+    Pass `summary=true` to leave out questions and participants. Pages of
+    the public feed are cached until a quiz on them ends or changes.
     """
     queryset = Quiz.objects.all().filter(is_deleted=False)
-    serializer_class = QuizSerializer
 
-    def get_queryset(self):
+    def list(self, request, *args, **kwargs):
+        if request.GET.get("course_id"):
+            return super(QuizListAPIView, self).list(request, *args, **kwargs)
+
+        page = feed.get_page(request)
+        if page is not None:
+            data, headers = page
+            return Response(data, headers=headers)
+
+        response = super(QuizListAPIView, self).list(request, *args, **kwargs)
+        headers = {'Link': response['Link']} if response.has_header('Link') else {}
+        feed.set_page(request, response.data, headers)
+        return response
+
+    def get_quiz_queryset(self):
         course_id = self.request.GET.get("course_id")
         if course_id:
             return Quiz.objects.filter(course_id=course_id).filter(is_deleted=False).order_by('end')
         else:
-            return Quiz.objects.annotate(num_questions=Count('questions')).filter(num_questions__gt=0).filter(is_private=False).filter(is_deleted=False).filter(end__gt=timezone.now()).order_by('end')
+            return Quiz.objects.filter(question_count__gt=0).filter(is_private=False).filter(is_deleted=False).filter(end__gt=timezone.now()).order_by('end')
 
 class QuizParticipantsListAPIView(ListAPIView):
     """
@@ -103,87 +178,78 @@ class QuizParticipantAnswerAPIView(APIView):
     """
     def get(self, request, format='json', *args, **kwargs):
         quiz_id = request.GET.get("quiz_id")
-        qs = Quiz.objects.all().filter(is_deleted=False).filter(id=quiz_id)
-        if qs.exists():
-            end_qs = qs.filter(end__lte=timezone.now())
-            if end_qs.exists():
-                quiz = end_qs.first()
-                is_participant = QuizParticipant.objects.filter(quiz=quiz).filter(participant=request.user)
-                if is_participant:
-                    data = []
-                    for question in quiz.questions.all():
-                        a_qs = ParticipantAnswer.objects.filter(question=question).filter(participant=request.user)
-                        if a_qs.exists():
-                            serializer = QuizParticipantAnswerSerializer(a_qs, many=True)
-                            data.append(serializer.data[0])
-
-                    if len(data) > 0:
-                        return Response(data, status=status.HTTP_200_OK)
-                    else:
-                        return Response(
-                            {'message': _('You cannot see the results because you have not answer any questions.')},
-                            status=status.HTTP_404_NOT_FOUND
-                        )
-                else:
-                    return Response(
-                        {'message': _('You are not in the list of participants.')},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            else:
-                return Response(
-                    {'message': _('The quiz has not finished yet.')},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
+        quiz = Quiz.objects.filter(is_deleted=False).filter(id=quiz_id).first()
+        if quiz is None:
             return Response(
                 {'message': _('Quiz is not found')},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if quiz.end > timezone.now():
+            return Response(
+                {'message': _('The quiz has not finished yet.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        is_participant = QuizParticipant.objects.filter(quiz=quiz).filter(participant=request.user).exists()
+        if not is_participant:
+            return Response(
+                {'message': _('You are not in the list of participants.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = QuizParticipantAnswerSerializer(answer_sheet(quiz, request.user.id), many=True)
+        data = serializer.data
+        if len(data) > 0:
+            return Response(data, status=status.HTTP_200_OK)
+        return Response(
+            {'message': _('You cannot see the results because you have not answer any questions.')},
+            status=status.HTTP_404_NOT_FOUND
+        )
 
 class QuizOwnerGetAnswersAPIView(APIView):
     """
-    Return a list of answers for specified quiz and user.
+    Return a list of answers for a finished quiz of the request user and
+    specified users. Answers of all participants are returned if no user_id
+    is given.
     """
     def get(self, request, format='json', *args, **kwargs):
         quiz_id = request.GET.get("quiz_id")
-        user_id = request.GET.get("user_id")
-        qs = Quiz.objects.all().filter(id=quiz_id).filter(is_deleted=False)
+        try:
+            user_ids = parse_user_ids(request)
+        except ValueError:
+            return Response(
+                {'message': _('User id is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        if qs.exists():
-            end_qs = qs.filter(end__lte=timezone.now())
-            if end_qs.exists():
-                quiz = end_qs.first()
-                is_participant = QuizParticipant.objects.filter(quiz=quiz).filter(participant__id=user_id)
-                if is_participant:
-                    data = []
-                    for question in quiz.questions.all():
-                        a_qs = ParticipantAnswer.objects.filter(question=question).filter(participant__id=user_id)
-                        if a_qs.exists():
-                            serializer = QuizParticipantAnswerSerializer(a_qs, many=True)
-                            data.append(serializer.data[0])
-
-                    if len(data) > 0:
-                        return Response(data, status=status.HTTP_200_OK)
-                    else:
-                        return Response(
-                            {'message': _('Participant not answer any questions.')},
-                            status=status.HTTP_404_NOT_FOUND
-                        )
-                else:
-                    return Response(
-                        {'message': _('User is not in the list of participants.')},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            else:
-                return Response(
-                    {'message': _('The quiz has not finished yet.')},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
+        quiz = Quiz.objects.filter(id=quiz_id).filter(owner=request.user).filter(is_deleted=False).first()
+        if quiz is None:
             return Response(
                 {'message': _('Quiz is not found')},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if quiz.end > timezone.now():
+            return Response(
+                {'message': _('The quiz has not finished yet.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if user_ids is not None:
+            participant_count = QuizParticipant.objects.filter(quiz=quiz).filter(participant_id__in=user_ids).count()
+            if participant_count != len(set(user_ids)):
+                return Response(
+                    {'message': _('User is not in the list of participants.')},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        serializer = QuizParticipantAnswerSerializer(quiz_answers(quiz, user_ids), many=True)
+        data = serializer.data
+        if len(data) > 0:
+            return Response(data, status=status.HTTP_200_OK)
+        return Response(
+            {'message': _('Participant not answer any questions.')},
+            status=status.HTTP_404_NOT_FOUND
+        )
 
 class QuizParticipantStatAPIView(APIView):
     queryset = QuizParticipant.objects.all()
@@ -199,85 +265,163 @@ class QuizParticipantStatAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class QuizOwnerAnswerAPIView(APIView):
-
+    """
+    Return a list of answers for a quiz of the request user. Answers of all
+    participants are returned if no user_id is given.
+    """
     def get(self, request, format='json', *args, **kwargs):
         quiz_id = request.GET.get("quiz_id")
-        user_id = request.GET.get("user_id")
+        try:
+            user_ids = parse_user_ids(request)
+        except ValueError:
+            return Response(
+                {'message': _('User id is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        qs = Quiz.objects.filter(id=quiz_id).filter(owner=request.user).filter(is_deleted=False)
-        if qs.exists():
-            quiz = qs.first()
-            data = []
-            for question in quiz.questions.all():
-                a_qs = ParticipantAnswer.objects.filter(question=question).filter(participant_id=user_id)
-                if a_qs.exists():
-                    serializer = QuizParticipantAnswerSerializer(a_qs, many=True)
-                    data.append(serializer.data)
-
-            if len(data) > 0:
-                return Response(data, status=status.HTTP_200_OK)
-            else:
-                return Response(
-                    {'message': _('Not found any answer for this quiz with this user.')},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+        quiz = Quiz.objects.filter(id=quiz_id).filter(owner=request.user).filter(is_deleted=False).first()
+        if quiz is None:
+            return Response(
+                {'message': _('Quiz is not found')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = QuizParticipantAnswerSerializer(quiz_answers(quiz, user_ids), many=True)
+        data = serializer.data
+        if len(data) > 0:
+            return Response(data, status=status.HTTP_200_OK)
         return Response(
-            {'message': _('Quiz is not found')},
+            {'message': _('Not found any answer for this quiz with this user.')},
             status=status.HTTP_404_NOT_FOUND
         )
 
-class QuizAppendView(UpdateAPIView):
-    queryset = Quiz.objects.all().filter(is_deleted=False)
-    serializer_class = QuizAppendSerializer
+class QuizAppendView(APIView):
+    """
+    Join a quiz. Everyone joins when a quiz starts, so the checks are made
+    against the cached snapshot of the quiz and joining is a single insert.
+    """
     permission_classes = (IsAuthenticated,)
 
     def put(self, request, *args, **kwargs):
-        object = self.get_object()
+        object = snapshot.get(kwargs['pk'])
+        if object is None or object['is_deleted']:
+            raise Http404
         if request.user.is_instructor:
             return Response(
                 {'message': _('Instructors cannot participate in a quiz.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if object.owner == request.user:
+        if object['owner_id'] == request.user.id:
             return Response(
                 {'message': _('You cannot participate in your own quiz.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if object.questions.count() == 0:
+        if object['question_count'] == 0:
             return Response(
                 {'message': _('There are no questions to answer. Please contact your instructor to add questions.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if object.is_private:
-            if object.course is None:
+        if object['is_private']:
+            if object['course_id'] is None:
                 return Response(
                     {'message': _('You cannot participate in a private quiz.')},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        if object.end < timezone.now():
+        if object['end'] < timezone.now():
             return Response(
                 {'message': _('Quiz has ended.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if object.start > timezone.now():
+        if object['start'] > timezone.now():
             return Response(
                 {'message': _('Quiz has not started yet.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        qs = QuizParticipant.objects.filter(quiz=object).filter(participant=request.user)
-        if qs.exists():
+        now = timezone.now()
+        if not join(object['id'], request.user.id, now):
             return Response(
                 {'message': _('You have already participate in this quiz.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        session.start(object, request.user.id, now)
+        timeline.invalidate([request.user.id])
+        return Response({
+            'id': object['id'],
+            'started': now,
+            'deadline': session.deadline(object, now),
+        }, status=status.HTTP_200_OK)
+
+class QuizSessionAPIView(APIView):
+    """
+    The running session of the request user in a quiz. GET returns its
+    start, deadline, remaining seconds and autosaved answers, PUT autosaves
+    the answers until the deadline. The deadline is checked against the
+    cache, the answers are kept on the participant.
+    """
+    permission_classes = (IsAuthenticated,)
 
-        return self.partial_update(request, *args, **kwargs)
+    def get_session(self, request, pk):
+        quiz = snapshot.get(pk)
+        if quiz is None or quiz['is_deleted']:
+            raise Http404
+        return quiz, session.get(quiz, request.user.id)
+
+    def not_joined(self):
+        return Response(
+            {'message': _('You have not joined this quiz.')},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    def perform_update(self, serializer):
-        object = self.get_object()
-        qp, created = QuizParticipant.objects.get_or_create(quiz=object, participant=self.request.user)
-        serializer.save()
+    def get(self, request, *args, **kwargs):
+        quiz, current = self.get_session(request, kwargs['pk'])
+        if current is None:
+            return self.not_joined()
+        return Response({
+            'quiz_id': quiz['id'],
+            'started': current.started,
+            'deadline': current.deadline,
+            'remaining': session.remaining(current, timezone.now()),
+            'answers': session.get_draft(quiz['id'], request.user.id),
+        })
+
+    def put(self, request, *args, **kwargs):
+        quiz, current = self.get_session(request, kwargs['pk'])
+        if current is None:
+            return self.not_joined()
+        now = timezone.now()
+        if now < quiz['start']:
+            return Response(
+                {'message': _('Quiz has not started yet.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if session.is_late(current, now):
+            return Response(
+                {'message': _('Time is up for this quiz.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        answers = request.data.get('answers')
+        if not isinstance(answers, list) or len(answers) > quiz['question_count']:
+            return Response(
+                {'message': _('Answers are not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        draft = {}
+        try:
+            for answer in answers:
+                draft[int(answer.get('question_id'))] = str(answer.get('answer') or '')
+        except (AttributeError, TypeError, ValueError):
+            return Response(
+                {'message': _('Question id is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not session.save_draft(quiz['id'], request.user.id, draft):
+            return Response(
+                {'message': _('You have already submitted this quiz.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'remaining': session.remaining(current, now)})
 
 class QuizDeleteAPIView(APIView):
     queryset = Quiz.objects.all()
@@ -339,3 +483,109 @@ class QuizCreateAPIView(CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+class QuizExportAPIView(APIView):
+    """
+    Stream the quizzes of the user with their questions as `csv` or `jsonl`,
+    one row per question. `course_id` and `quiz_id` narrow the export.
+    """
+    def get(self, request, file_format, *args, **kwargs):
+        if file_format not in transfer.FORMATS:
+            return Response(
+                {'message': _('File format is not supported.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            quiz_ids = parse_ids(request, "quiz_id")
+            course_ids = parse_ids(request, "course_id")
+        except ValueError:
+            return Response(
+                {'message': _('Quiz or course is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        quizzes = Quiz.objects.filter(owner=request.user).filter(is_deleted=False)
+        if quiz_ids is not None:
+            quizzes = quizzes.filter(id__in=quiz_ids)
+        if course_ids is not None:
+            quizzes = quizzes.filter(course_id__in=course_ids)
+
+        return streaming_response(transfer.export_lines(quizzes, file_format), file_format, 'quizzes')
+
+class QuizImportAPIView(APIView):
+    """
+    Create quizzes with their questions from an uploaded `csv` or `jsonl`
+    file in the format QuizExportAPIView writes. Instructors can give
+    `course_id` to add the quizzes to one of their courses. The whole file
+    is checked before anything is saved.
+    """
+    def post(self, request, file_format, *args, **kwargs):
+        if file_format not in transfer.FORMATS:
+            return Response(
+                {'message': _('File format is not supported.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'message': _('File is required.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        course = None
+        if request.user.is_instructor:
+            if not request.user.instructor.is_approved:
+                return Response(
+                    {'message': _('You should be approved by admin to create a quiz.')},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            course_id = request.data.get('course_id')
+            if course_id:
+                course = Course.objects.filter(id=course_id).filter(owner=request.user.instructor).first()
+                if course is None:
+                    return Response(
+                        {'message': _('Course is not found.')},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+
+        try:
+            rows = transfer.read_rows(codecs.iterdecode(upload, 'utf-8-sig'), file_format)
+            quizzes, errors = transfer.import_quizzes(request.user, rows, course=course)
+        except (UnicodeDecodeError, csv.Error):
+            return Response(
+                {'message': _('File could not be read.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = QuizSummarySerializer(quizzes, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class QuizAnalyticsAPIView(APIView):
+    """
+    Grade histogram, mean, median and percentiles of a quiz and the correct
+    rate and average points of its questions. `bins` sets the number of
+    histogram ranges. Only the owner can see them.
+    """
+    def get(self, request, pk, *args, **kwargs):
+        try:
+            bins = int(request.GET.get("bins", analytics.DEFAULT_BINS))
+        except ValueError:
+            bins = 0
+        if not 0 < bins <= analytics.MAX_BINS:
+            return Response(
+                {'message': _('Number of bins is not valid.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        quiz = Quiz.objects.filter(pk=pk).filter(owner=request.user).filter(is_deleted=False).first()
+        if quiz is None:
+            return Response(
+                {'message': _('Quiz is not found.')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(analytics.quiz_analytics(quiz, bins))
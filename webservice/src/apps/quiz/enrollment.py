@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.utils import timezone
+
+from account.models import Student
+from quiz.models import Quiz, QuizParticipant
+from quiz import feed, timeline
+
+def enrolling_quizzes(course_ids):
+    """
+    Return the ids of the not deleted, not ended auto enrollment quizzes of
+    the courses.
+    """
+    return list(
+        Quiz.objects
+            .filter(course_id__in=course_ids, auto_enroll=True, is_deleted=False)
+            .filter(end__gt=timezone.now())
+            .values_list('id', flat=True)
+    )
+
+def enroll(quiz_ids, user_ids):
+    """
+    Make the users participants of the quizzes with one INSERT, pairs which
+    already joined are skipped by the database. The participant counts are
+    taken again in the same transaction, the skipped pairs are not known,
+    and the timelines of the users are brought up to date.
+    """
+    quiz_ids, user_ids = list(quiz_ids), list(user_ids)
+    if not quiz_ids or not user_ids:
+        return
+    with transaction.atomic():
+        QuizParticipant.objects.bulk_create([
+            QuizParticipant(quiz_id=quiz_id, participant_id=user_id)
+            for quiz_id in quiz_ids
+            for user_id in user_ids
+        ], ignore_conflicts=True)
+        Quiz.objects.filter(id__in=quiz_ids).refresh_counts()
+    feed.invalidate()
+    timeline.invalidate(user_ids)
+
+def enroll_course(quiz):
+    """
+    Enroll every student of the course of an auto enrollment quiz.
+    """
+    if not quiz.auto_enroll or quiz.course_id is None or quiz.is_deleted:
+        return
+    if quiz.end <= timezone.now():
+        return
+    enroll([quiz.id], Student.objects.filter(course=quiz.course_id).values_list('user_id', flat=True))
+
+def enroll_students(course_ids, user_ids):
+    """
+    Enroll students who were added to the courses into their running and
+    upcoming auto enrollment quizzes.
+    """
+    enroll(enrolling_quizzes(course_ids), user_ids)
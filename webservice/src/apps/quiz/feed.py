@@ -0,0 +1,59 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+VERSION_KEY = 'quiz-feed-version'
+
+def get_cache():
+    return caches[getattr(settings, 'QUIZ_FEED_CACHE', 'default')]
+
+def get_version():
+    """
+    Return the current version of the feed. Versions never repeat, so a lost
+    version key cannot bring back pages cached under an earlier one.
+    """
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+def invalidate():
+    """
+    Drop every cached page of the public feed by moving to a new version.
+    """
+    get_cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+
+def page_key(request):
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(repr(query).encode('utf-8')).hexdigest()
+    return 'quiz-feed:{0}:{1}'.format(get_version(), digest)
+
+def page_timeout(data):
+    """
+    Keep a page until its first quiz ends. The feed is ordered by end, so
+    nothing on the page changes with time before that.
+    """
+    max_timeout = getattr(settings, 'QUIZ_FEED_CACHE_TIMEOUT', 300)
+    if not data:
+        return max_timeout
+    end = parse_datetime(data[0]['end'])
+    if end is None:
+        return 0
+    return max(0, min(max_timeout, int((end - timezone.now()).total_seconds())))
+
+def get_page(request):
+    """
+    Return (data, headers) of a cached page or None.
+    """
+    return get_cache().get(page_key(request))
+
+def set_page(request, data, headers):
+    timeout = page_timeout(data)
+    if timeout > 0:
+        get_cache().set(page_key(request), (list(data), headers), timeout)
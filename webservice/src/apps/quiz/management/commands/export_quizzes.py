@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.models import Quiz
+from quiz import transfer
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Write quizzes with their questions as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', required=True, help='Username of the owner of the quizzes.')
+        parser.add_argument('--course', type=int, help='Only export the quizzes of this course.')
+        parser.add_argument('--format', choices=transfer.FORMATS, default='jsonl')
+        parser.add_argument('--output', help='File to write, standard output if not given.')
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError('User {0!r} is not found.'.format(options['owner']))
+
+        quizzes = Quiz.objects.filter(owner=owner).filter(is_deleted=False)
+        if options['course'] is not None:
+            quizzes = quizzes.filter(course_id=options['course'])
+
+        lines = transfer.export_lines(quizzes, options['format'])
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            output.writelines(lines)
@@ -0,0 +1,44 @@
+import os
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from course.models import Course
+from quiz import transfer
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Create quizzes with their questions from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File written by export_quizzes.')
+        parser.add_argument('--owner', required=True, help='Username of the owner of the quizzes.')
+        parser.add_argument('--course', type=int, help='Id of a course of the owner.')
+        parser.add_argument('--format', choices=transfer.FORMATS,
+                            help='File format, read from the extension if not given.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.')
+        if file_format not in transfer.FORMATS:
+            raise CommandError('Unknown file format {0!r}.'.format(file_format))
+
+        owner = User.objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError('User {0!r} is not found.'.format(options['owner']))
+
+        course = None
+        if options['course'] is not None:
+            course = Course.objects.filter(id=options['course']).filter(owner__user=owner).first()
+            if course is None:
+                raise CommandError('Course {0} of {1!r} is not found.'.format(options['course'], owner.username))
+
+        with open(options['path'], newline='', encoding='utf-8-sig') as lines:
+            quizzes, errors = transfer.import_quizzes(owner, transfer.read_rows(lines, file_format), course=course)
+
+        for error in errors:
+            self.stderr.write('Line {0}: {1} {2}'.format(error['line'], error['message'], error['errors'] or ''))
+        if errors:
+            raise CommandError('Nothing was imported.')
+
+        questions = sum(quiz.question_count for quiz in quizzes)
+        self.stdout.write('Imported {0} quizzes with {1} questions.'.format(len(quizzes), questions))
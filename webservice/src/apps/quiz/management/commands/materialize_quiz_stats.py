@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz.models import Quiz
+from quiz import analytics
+
+class Command(BaseCommand):
+    help = 'Write the analytics of ended quizzes into QuizStats and QuestionStats.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Compute the stats of quizzes which already have them again.')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.filter(is_deleted=False).filter(end__lte=timezone.now())
+        if not options['all']:
+            quizzes = quizzes.filter(stats__isnull=True)
+        count = 0
+        for quiz in quizzes.iterator():
+            analytics.materialize(quiz)
+            count += 1
+        self.stdout.write('Materialized stats of {0} quizzes.'.format(count))
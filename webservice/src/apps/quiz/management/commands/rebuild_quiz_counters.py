@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz.models import Quiz
+from quiz import feed
+
+class Command(BaseCommand):
+    help = 'Recompute question_count and participant_count of every quiz.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--running', action='store_true',
+            help='Only quizzes which have started and had not ended --interval '
+                 'minutes ago, see QUIZ_COUNTER_INTERVAL in the settings.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=getattr(settings, 'QUIZ_COUNTER_INTERVAL', 10),
+            help='Minutes between two --running runs, quizzes which ended '
+                 'since the previous run are counted once more.',
+        )
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['running']:
+            now = timezone.now()
+            # one minute more for runs that start late
+            since = now - timedelta(minutes=options['interval'] + 1)
+            quizzes = quizzes.filter(start__lte=now, end__gt=since)
+        count = quizzes.refresh_counts()
+        feed.invalidate()
+        self.stdout.write('Rebuilt counters of {0} quizzes.'.format(count))
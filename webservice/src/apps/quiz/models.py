@@ -1,10 +1,51 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+def count_of(model):
+    """
+    Return a subquery counting the rows of the model for the outer quiz.
+    """
+    qs = model.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+    count = qs.annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(count, output_field=models.IntegerField()), 0)
+
+class QuizQuerySet(models.query.QuerySet):
+    def with_relations(self):
+        """
+        Load owner and course with the same query and fetch participants
+        and questions with one query each, so that serializing a list of
+        quizzes costs a fixed number of queries.
+        """
+        return self.select_related('owner', 'course').prefetch_related('participants', 'questions')
+
+    def with_counts(self):
+        """
+        Load what the summary representation needs. question_count and
+        participant_count are kept on the quiz by the receivers in
+        quiz.signals, so no questions or participants are loaded.
+        """
+        return self.select_related('owner', 'course')
+
+    def refresh_counts(self):
+        """
+        Recompute question_count and participant_count of the quizzes
+        with one UPDATE statement.
+        """
+        return self.update(
+            question_count=count_of(self.model.questions.through),
+            participant_count=count_of(QuizParticipant),
+        )
+
+class QuizManager(models.Manager):
+    def get_queryset(self):
+        return QuizQuerySet(self.model, using=self._db)
+
 # Create your models here.
 class Quiz(models.Model):
     owner           = models.ForeignKey(User,
@@ -24,6 +65,7 @@ class Quiz(models.Model):
                                              related_name='participants')
     start           = models.DateTimeField(_('Quiz Start'), default=timezone.now)
     end             = models.DateTimeField(_('Quiz End'), default=timezone.now)
+    duration        = models.PositiveIntegerField(_('Duration in Minutes'), null=True, blank=True)
     name            = models.CharField(_('Quiz Name'), max_length=50)
     description     = models.CharField(_('Quiz Description'), max_length=255, null=True, blank=True)
     slug            = models.SlugField(unique=True, blank=True, max_length=120)
@@ -31,22 +73,44 @@ class Quiz(models.Model):
     percentage      = models.DecimalField(_('Percentage'), default=0.0, max_digits=100, decimal_places=2)
     is_private      = models.BooleanField(_('Private Quiz'), default=False)
     is_deleted      = models.BooleanField(_('Quiz Deleted'), default=False)
+    auto_enroll     = models.BooleanField(_('Enroll Course Students'), default=False)
+    question_count  = models.PositiveIntegerField(_('Question Count'), default=0, editable=False)
+    participant_count = models.PositiveIntegerField(_('Participant Count'), default=0, editable=False)
+
+    objects = QuizManager()
 
     class Meta:
         verbose_name = _('Quiz')
         verbose_name_plural = _('Quizzes')
+        indexes = [
+            # public feed: not private, has questions, not ended, by end
+            models.Index(fields=['is_private', 'end'],
+                         name='quiz_public_end_idx',
+                         condition=models.Q(is_deleted=False)),
+            # quizzes of a course by end
+            models.Index(fields=['course', 'end'],
+                         name='quiz_course_end_idx',
+                         condition=models.Q(is_deleted=False)),
+            # quizzes of an owner by end
+            models.Index(fields=['owner', '-end'],
+                         name='quiz_owner_end_idx',
+                         condition=models.Q(is_deleted=False)),
+        ]
+
+    COUNTER_FIELDS = ('question_count', 'participant_count')
 
     def __str__(self):
         return self.name
 
-    def update_percentage(self, value):
-        new_value = value - self.percentage
-        if value - self.percentage > 100:
-            self.percentage = 0
-        else:
-            self.percentage = 100 - new_value
-
-        self.save()
+    def save(self, *args, **kwargs):
+        # counters are changed with UPDATE statements by quiz.signals, an
+        # instance loaded before such a change must not write them back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in Quiz.COUNTER_FIELDS
+            ]
+        super(Quiz, self).save(*args, **kwargs)
 
 class QuizParticipant(models.Model):
     quiz        = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True)
@@ -63,11 +127,57 @@ class QuizParticipant(models.Model):
                                       decimal_places=2)
 
     finished_in = models.CharField(_('Completion Time'), max_length=50, blank=True)
+    started     = models.DateTimeField(_('Started'), null=True, blank=True)
+    # autosaved answers as a JSON object of answers by question id
+    draft       = models.TextField(_('Autosaved Answers'), blank=True, default='')
 
     class Meta:
         verbose_name = _('Quiz Participant')
         verbose_name_plural = _('Quiz Participants')
         unique_together = ("quiz", "participant")
+        indexes = [
+            # quizzes of a participant
+            models.Index(fields=['participant', 'quiz'], name='quizparticipant_user_quiz_idx'),
+        ]
 
     def __str__(self):
         return self.quiz.owner.username
+
+class QuizStats(models.Model):
+    """
+    Grade distribution of an ended quiz, written by quiz.analytics so the
+    analytics of a quiz are not computed again on every request.
+    """
+    quiz              = models.OneToOneField(Quiz,
+                                             on_delete=models.CASCADE,
+                                             primary_key=True,
+                                             related_name='stats')
+
+    participant_count = models.PositiveIntegerField(_('Participant Count'), default=0)
+    max_points        = models.PositiveIntegerField(_('Max Points'), default=0)
+    grades            = models.TextField(_('Grade Counts'), default='[]')
+    updated           = models.DateTimeField(_('Updated'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('Quiz Stats')
+        verbose_name_plural = _('Quiz Stats')
+
+    def __str__(self):
+        return self.quiz.name
+
+class QuestionStats(models.Model):
+    quiz          = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='question_stats')
+    question      = models.ForeignKey('question.Question', on_delete=models.CASCADE)
+
+    answer_count  = models.PositiveIntegerField(_('Answer Count'), default=0)
+    graded_count  = models.PositiveIntegerField(_('Graded Count'), default=0)
+    correct_count = models.PositiveIntegerField(_('Correct Count'), default=0)
+    point_sum     = models.PositiveIntegerField(_('Point Sum'), default=0)
+
+    class Meta:
+        verbose_name = _('Question Stats')
+        verbose_name_plural = _('Question Stats')
+        unique_together = ('quiz', 'question')
+
+    def __str__(self):
+        return self.question.question
@@ -0,0 +1,68 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from question.models import ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant
+
+def quiz_answers(quiz, participant_ids=None):
+    """
+    Return the answers given to the quiz in one query with their questions
+    joined in. If participant_ids is given only the answers of those
+    participants are returned, otherwise the answers of the whole quiz.
+    Answers to questions that were removed from the quiz are left out.
+    """
+    qs = ParticipantAnswer.objects \
+        .filter(quiz=quiz, question__quiz=quiz) \
+        .select_related('question')
+    if participant_ids is not None:
+        qs = qs.filter(participant_id__in=participant_ids)
+    return qs.order_by('participant_id', 'question_id')
+
+def answer_sheet(quiz, participant_id):
+    """
+    Return the answers of a participant for the given quiz in one query.
+    """
+    return quiz_answers(quiz, participant_ids=[participant_id])
+
+def parse_ids(request, name):
+    """
+    Return the ids given as `name=1&name=2` or `name=1,2`. None is returned
+    when no id is given and ValueError is raised if any of them is not a
+    number.
+    """
+    values = request.GET.getlist(name)
+    if not values:
+        return None
+    ids = []
+    for value in values:
+        for id in value.split(','):
+            if id.strip():
+                ids.append(int(id))
+    return ids or None
+
+def parse_user_ids(request):
+    """
+    Return the user ids given as `user_id=1&user_id=2` or `user_id=1,2`.
+    """
+    return parse_ids(request, "user_id")
+
+def join(quiz_id, user_id, started):
+    """
+    Add the user to the participants of the quiz with one INSERT, recording
+    when they started, and return False if the user had already joined,
+    which the unique constraint on (quiz, participant) tells. A participant
+    who was enrolled without joining starts now instead. The quiz row is
+    not read, only participant_count is increased in the same transaction;
+    no signal is sent.
+    """
+    try:
+        with transaction.atomic():
+            QuizParticipant.objects.bulk_create([
+                QuizParticipant(quiz_id=quiz_id, participant_id=user_id, started=started)
+            ])
+            Quiz.objects.filter(id=quiz_id).update(participant_count=F('participant_count') + 1)
+    except IntegrityError:
+        return QuizParticipant.objects \
+            .filter(quiz_id=quiz_id, participant_id=user_id, started__isnull=True) \
+            .update(started=started) > 0
+    return True
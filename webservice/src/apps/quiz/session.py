@@ -0,0 +1,106 @@
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from quiz.models import QuizParticipant
+
+Session = namedtuple('Session', ('started', 'deadline'))
+
+HUNDRED = Decimal(100)
+
+def get_cache():
+    return caches[getattr(settings, 'QUIZ_SESSION_CACHE', 'default')]
+
+def session_key(quiz_id, user_id):
+    return 'quiz-session:{0}:{1}'.format(quiz_id, user_id)
+
+def grace():
+    """
+    Time a submission may arrive after the deadline, for the network.
+    """
+    return timedelta(seconds=getattr(settings, 'QUIZ_SESSION_GRACE', 30))
+
+def deadline(quiz, started):
+    """
+    Return when the time of a participant who started at `started` is up:
+    the end of the quiz, or earlier when the quiz has a duration.
+    """
+    if quiz['duration']:
+        return min(quiz['end'], started + timedelta(minutes=quiz['duration']))
+    return quiz['end']
+
+def timeout(quiz, started):
+    return max(int((deadline(quiz, started) + grace() - timezone.now()).total_seconds()), 1)
+
+def start(quiz, user_id, started):
+    """
+    Keep the start time of the participant until the deadline passes. Only
+    the start time is kept, the deadline is computed from the quiz snapshot
+    so a changed end or duration applies to running sessions.
+    """
+    get_cache().set(session_key(quiz['id'], user_id), started.timestamp(), timeout(quiz, started))
+
+def get(quiz, user_id):
+    """
+    Return the session of the user in the quiz, given as its snapshot, or
+    None if the user has not joined. A cached session costs no query, else
+    the start time is read from the participant once. Participants who
+    joined before start times were recorded started with the quiz.
+    """
+    started = get_cache().get(session_key(quiz['id'], user_id))
+    if started is not None:
+        started = datetime.fromtimestamp(started, timezone.utc)
+    else:
+        rows = list(
+            QuizParticipant.objects
+                .filter(quiz_id=quiz['id'], participant_id=user_id)
+                .values_list('started', flat=True)[:1]
+        )
+        if not rows:
+            return None
+        started = rows[0] or quiz['start']
+        start(quiz, user_id, started)
+    return Session(started, deadline(quiz, started))
+
+def is_late(session, now):
+    return now > session.deadline + grace()
+
+def remaining(session, now):
+    return max(int((session.deadline - now).total_seconds()), 0)
+
+def finished_in(session, now):
+    """
+    Time the participant worked on the quiz as `minutes:seconds`, never
+    more than the time they had.
+    """
+    seconds = max(int((min(now, session.deadline) - session.started).total_seconds()), 0)
+    return '{0}:{1:02d}'.format(seconds // 60, seconds % 60)
+
+def completion(quiz, answered):
+    """
+    Percentage of the questions of the quiz that were answered.
+    """
+    if not quiz['question_count']:
+        return Decimal(0)
+    return min(Decimal(answered) * HUNDRED / quiz['question_count'], HUNDRED).quantize(Decimal('0.01'))
+
+def save_draft(quiz_id, user_id, answers):
+    """
+    Keep the answers of a participant who has not submitted yet, with one
+    UPDATE. Return False if there is no such participant.
+    """
+    return QuizParticipant.objects \
+        .filter(quiz_id=quiz_id, participant_id=user_id, finished_in='') \
+        .update(draft=json.dumps(answers)) > 0
+
+def get_draft(quiz_id, user_id):
+    draft = QuizParticipant.objects \
+        .filter(quiz_id=quiz_id, participant_id=user_id) \
+        .values_list('draft', flat=True) \
+        .first()
+    return {int(question_id): answer for question_id, answer in json.loads(draft or '{}').items()}
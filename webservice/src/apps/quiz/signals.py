@@ -1,14 +1,20 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
 from utils.utils import unique_slug_generator
 from account.models import Instructor
 from quiz.models import Quiz, QuizParticipant
 from course.models import Course
+from question.models import Question
+from notification.models import OutgoingMail
+from quiz import feed, snapshot, timeline
+from quiz.weighting import fit_percentage
+from quiz.enrollment import enroll_course
 
 @receiver(pre_save, sender=Quiz)
 def quiz_pre_save_receiver(sender, instance, *args, **kwargs):
+	feed.invalidate()
 	if not instance.slug:
 		instance.slug = unique_slug_generator(instance)
 
@@ -17,32 +23,90 @@ def quiz_pre_save_receiver(sender, instance, *args, **kwargs):
 
 @receiver(post_save, sender=Quiz)
 def quiz_post_save_receiver(sender, instance, created, *args, **kwargs):
+	feed.invalidate()
+	snapshot.invalidate([instance.id])
+	if not created:
+		timeline.invalidate_quiz([instance.id])
 	if created:
 		qs_exist = Instructor.objects.filter(user=instance.owner).exists()
 		if qs_exist:
 			course = get_object_or_404(Course, id=instance.course.id)
-			students = course.students.all()
-			emails = []
-			for student in students:
-				# participant = QuizParticipant(quiz=instance, participant=student.user)
-				# participant.save()
-				emails.append(student.user.email)
-
-			send_mail(
-			    "A NEW QUIZ HAS BEEN CREATED",
-			    "Hello from QuizMaker. You've been added to a quiz lately.",
-			    'se301quizmaker@gmail.com',
-			    emails,
-			    fail_silently=False,
-			)
+			emails = list(course.students.values_list('user__email', flat=True))
+			if emails:
+				OutgoingMail.objects.queue(
+				    "A NEW QUIZ HAS BEEN CREATED",
+				    "Hello from QuizMaker. You've been added to a quiz lately.",
+				    'se301quizmaker@gmail.com',
+				    emails,
+				)
 		else:
 			instance.course = None
 
-	quizzes = Quiz.objects.filter(course=instance.course).filter(owner=instance.owner).all()
-	quiz_count = quizzes.count()
-	total_value = 0
-	for quiz in quizzes:
-	    total_value = total_value + quiz.percentage
+	fit_percentage(instance)
+	enroll_course(instance)
 
-	if total_value > 100 and instance.be_graded:
-		instance.update_percentage(value=total_value)
+@receiver(m2m_changed, sender=Quiz.questions.through)
+def quiz_questions_changed_receiver(sender, instance, action, reverse, pk_set, *args, **kwargs):
+	if action.startswith('post_'):
+		feed.invalidate()
+		if not reverse:
+			timeline.invalidate_quiz([instance.id])
+			snapshot.invalidate([instance.id])
+		elif pk_set:
+			timeline.invalidate_quiz(pk_set)
+			snapshot.invalidate(pk_set)
+	elif action == 'pre_clear' and reverse:
+		quiz_ids = list(instance.quiz_set.values_list('id', flat=True))
+		timeline.invalidate_quiz(quiz_ids)
+		snapshot.invalidate(quiz_ids)
+	if action in ('post_add', 'post_remove'):
+		if not pk_set:
+			return
+		if reverse:
+			quizzes = Quiz.objects.filter(id__in=pk_set)
+		else:
+			quizzes = Quiz.objects.filter(id=instance.id)
+		if action == 'post_remove':
+			# pk_set holds every pk given to remove(), linked or not
+			quizzes.refresh_counts()
+			return
+		# add() sends only the pks it linked
+		step = 1 if reverse else len(pk_set)
+		quizzes.update(question_count=F('question_count') + step)
+	elif action == 'pre_clear':
+		if reverse:
+			Quiz.objects.filter(questions=instance).update(question_count=F('question_count') - 1)
+		else:
+			Quiz.objects.filter(id=instance.id).update(question_count=0)
+
+@receiver(pre_delete, sender=Question)
+def question_pre_delete_receiver(sender, instance, *args, **kwargs):
+	feed.invalidate()
+	quiz_ids = list(Quiz.objects.filter(questions=instance).values_list('id', flat=True))
+	timeline.invalidate_quiz(quiz_ids)
+	snapshot.invalidate(quiz_ids)
+	# rows of the through table are deleted without m2m_changed
+	Quiz.objects.filter(questions=instance).update(question_count=F('question_count') - 1)
+
+@receiver(post_save, sender=QuizParticipant)
+def participant_post_save_receiver(sender, instance, created, *args, **kwargs):
+	if created and instance.quiz_id:
+		feed.invalidate()
+		timeline.invalidate([instance.participant_id])
+		Quiz.objects.filter(id=instance.quiz_id).update(participant_count=F('participant_count') + 1)
+
+@receiver(post_delete, sender=QuizParticipant)
+def participant_post_delete_receiver(sender, instance, *args, **kwargs):
+	feed.invalidate()
+	timeline.invalidate([instance.participant_id])
+	# the count is taken again instead of decreased, so counts which went
+	# wrong do not stay wrong
+	if instance.quiz_id:
+		Quiz.objects.filter(id=instance.quiz_id).refresh_counts()
+
+@receiver(post_save, sender=Question)
+def question_post_save_receiver(sender, instance, created, *args, **kwargs):
+	# questions are embedded in the feed
+	if not created:
+		feed.invalidate()
+		timeline.invalidate_quiz(Quiz.objects.filter(questions=instance).values_list('id', flat=True))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from quiz.models import Quiz
+
+FIELDS = ('id', 'owner_id', 'course_id', 'is_private', 'is_deleted', 'question_count', 'start', 'end', 'duration')
+
+def get_cache():
+    return caches[getattr(settings, 'QUIZ_SNAPSHOT_CACHE', 'default')]
+
+def snapshot_key(quiz_id):
+    return 'quiz-snapshot:{0}'.format(quiz_id)
+
+def get(quiz_id):
+    """
+    Return the fields of the quiz which decide who can join it as a dict,
+    from the cache when possible, or None if there is no such quiz. When a
+    quiz starts every participant asks for it at once, so it is read from
+    the database once instead of once per participant.
+    """
+    try:
+        quiz_id = int(quiz_id)
+    except (TypeError, ValueError):
+        return None
+    cache = get_cache()
+    snapshot = cache.get(snapshot_key(quiz_id))
+    if snapshot is None:
+        snapshot = Quiz.objects.filter(id=quiz_id).values(*FIELDS).first()
+        if snapshot is None:
+            return None
+        cache.set(snapshot_key(quiz_id), snapshot, getattr(settings, 'QUIZ_SNAPSHOT_CACHE_TIMEOUT', 60))
+    return snapshot
+
+def invalidate(quiz_ids):
+    get_cache().delete_many([snapshot_key(quiz_id) for quiz_id in quiz_ids])
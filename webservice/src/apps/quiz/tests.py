@@ -1,3 +1,551 @@
+from datetime import timedelta
+from unittest import skipUnless
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User, Student, Instructor
+from course.models import Course
+from question.models import Question, ParticipantAnswer
+from quiz.models import Quiz, QuizParticipant
+from quiz import feed
+from quiz.weighting import fit_course_percentages
 
 # Create your tests here.
+class QuizListQueryCountTests(TestCase):
+    """
+    Serializing a quiz list must cost a fixed number of queries no matter
+    how many quizzes are listed.
+    """
+    quiz_count = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.student = User.objects.create_user('student', 'student@quizmaker.com', 'password', user_type='S')
+        Student.objects.create(user=cls.student, student_id='1')
+        course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+
+        now = timezone.now()
+        Quiz.objects.bulk_create([
+            Quiz(
+                owner=cls.instructor,
+                course=course,
+                name='Quiz {0}'.format(i),
+                slug='quiz-{0}'.format(i),
+                start=now - timedelta(days=1),
+                end=now + timedelta(days=1) if i % 2 else now - timedelta(hours=1),
+            ) for i in range(cls.quiz_count)
+        ])
+        question = Question.objects.create(question='Question', answer='A', point=10)
+        quizzes = list(Quiz.objects.all())
+        Quiz.questions.through.objects.bulk_create([
+            Quiz.questions.through(quiz=quiz, question=question) for quiz in quizzes
+        ])
+        QuizParticipant.objects.bulk_create([
+            QuizParticipant(quiz=quiz, participant=cls.student) for quiz in quizzes
+        ])
+        Quiz.objects.all().refresh_counts()
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, url, num_queries, params=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.assertNumQueries(num_queries):
+            response = client.get(url, dict(params or {}, page_size=self.quiz_count))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_course_list(self):
+        course_id = Course.objects.first().id
+        data = self.get(self.student, '/api/quiz/', 3, {'course_id': course_id})
+        self.assertEqual(len(data), self.quiz_count)
+        # answers of the questions only in the owner list and the quiz itself
+        self.assertNotIn('answer', data[0]['questions'][0])
+
+    def test_owner_list(self):
+        data = self.get(self.instructor, '/api/quiz/owner', 3)
+        self.assertEqual(len(data), self.quiz_count)
+        self.assertEqual(data[0]['questions'][0]['answer'], 'A')
+
+    def test_end_list(self):
+        # the last query finds when the timeline moves for its cache
+        data = self.get(self.student, '/api/quiz/participator/end', 4)
+        self.assertEqual(len(data), self.quiz_count // 2)
+
+    def test_waiting_list(self):
+        data = self.get(self.student, '/api/quiz/participator/waiting', 4)
+        self.assertEqual(len(data), self.quiz_count // 2)
+        self.assertNotIn('answer', data[0]['questions'][0])
+
+    def test_pagination_is_opt_in(self):
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        response = client.get('/api/quiz/owner')
+        self.assertEqual(len(response.json()), self.quiz_count)
+        self.assertNotIn('Link', response)
+
+        response = client.get('/api/quiz/owner', {'page_size': 100})
+        self.assertEqual(len(response.json()), 100)
+        self.assertIn('rel="next"', response['Link'])
+        next_url = response['Link'][1:response['Link'].index('>')]
+        self.assertEqual(len(client.get(next_url).json()), 100)
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is sqlite syntax')
+class QuizListIndexTests(TestCase):
+    """
+    Every query of the list views in quiz/api/views.py searches an index
+    instead of scanning a table.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.student = User.objects.create_user('student', 'student@quizmaker.com', 'password', user_type='S')
+        Student.objects.create(user=cls.student, student_id='1')
+        cls.course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+
+        now = timezone.now()
+        cls.ended = Quiz.objects.create(owner=cls.instructor, course=cls.course, name='Ended', end=now - timedelta(hours=1))
+        cls.public = Quiz.objects.create(owner=cls.student, name='Public', end=now + timedelta(hours=1))
+        question = Question.objects.create(question='Question', answer='A', point=10)
+        cls.ended.questions.add(question)
+        cls.public.questions.add(question)
+        QuizParticipant.objects.create(quiz=cls.ended, participant=cls.student)
+        ParticipantAnswer.objects.create(quiz=cls.ended, question=question, participant=cls.student, answer='A')
+
+    def setUp(self):
+        cache.clear()
+
+    def query_plans(self, user, url, params=None):
+        statements = []
+        def capture(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        with connection.execute_wrapper(capture):
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in statements:
+                if sql.lstrip().upper().startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                    plans.extend(row[-1] for row in cursor.fetchall())
+        return plans
+
+    def assertUsesIndexes(self, user, url, params=None):
+        plans = self.query_plans(user, url, params)
+        self.assertTrue(plans)
+        scans = [plan for plan in plans if plan.startswith('SCAN')]
+        self.assertEqual(scans, [], url)
+
+    def test_public_list(self):
+        self.assertUsesIndexes(self.student, '/api/quiz/')
+        self.assertUsesIndexes(self.student, '/api/quiz/', {'summary': 'true'})
+
+    def test_course_list(self):
+        self.assertUsesIndexes(self.student, '/api/quiz/', {'course_id': self.course.id})
+
+    def test_owner_list(self):
+        self.assertUsesIndexes(self.instructor, '/api/quiz/owner')
+
+    def test_participator_lists(self):
+        self.assertUsesIndexes(self.student, '/api/quiz/participator/end')
+        self.assertUsesIndexes(self.student, '/api/quiz/participator/waiting')
+
+    def test_participants(self):
+        self.assertUsesIndexes(self.instructor, '/api/quiz/participants', {'quiz_id': self.ended.id})
+        self.assertUsesIndexes(self.instructor, '/api/quiz/participator/stats', {'quiz_id': self.ended.id})
+
+    def test_answers(self):
+        params = {'quiz_id': self.ended.id, 'user_id': self.student.id}
+        self.assertUsesIndexes(self.student, '/api/quiz/participator/answers', params)
+        self.assertUsesIndexes(self.instructor, '/api/quiz/owner/answers', params)
+        self.assertUsesIndexes(self.instructor, '/api/quiz/answers', params)
+
+    def test_answers_of_other_owner(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        for url in ('/api/quiz/owner/answers', '/api/quiz/answers'):
+            response = client.get(url, {'quiz_id': self.ended.id})
+            self.assertEqual(response.status_code, 404, url)
+
+class QuizAppendTests(TestCase):
+    """
+    Joining a started quiz is one insert and a counter update once the quiz
+    is cached.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.students = []
+        for i in range(2):
+            student = User.objects.create_user('student{0}'.format(i), 'student{0}@quizmaker.com'.format(i), 'password', user_type='S')
+            Student.objects.create(user=student, student_id=str(i))
+            cls.students.append(student)
+        course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        now = timezone.now()
+        cls.quiz = Quiz.objects.create(
+            owner=cls.instructor,
+            course=course,
+            name='Quiz',
+            start=now - timedelta(minutes=1),
+            end=now + timedelta(hours=1),
+            is_private=True,
+        )
+        cls.quiz.questions.add(Question.objects.create(question='Question', answer='A', point=10))
+
+    def setUp(self):
+        cache.clear()
+
+    def put(self, user, pk=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.put('/api/quiz/append/{0}'.format(pk or self.quiz.id), {}, format='json')
+
+    def test_join(self):
+        # the snapshot of the quiz, then the insert and the count in a savepoint
+        with self.assertNumQueries(5):
+            response = self.put(self.students[0])
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(4):
+            response = self.put(self.students[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quiz.participants.count(), 2)
+
+    def test_join_twice(self):
+        self.assertEqual(self.put(self.students[0]).status_code, 200)
+        response = self.put(self.students[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(QuizParticipant.objects.filter(quiz=self.quiz).count(), 1)
+
+    def test_participant_count(self):
+        self.put(self.students[0])
+        self.put(self.students[0])
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).participant_count, 1)
+        self.put(self.students[1])
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).participant_count, 2)
+
+    def test_snapshot_invalidated(self):
+        self.put(self.students[0])
+        self.quiz.end = timezone.now() - timedelta(minutes=1)
+        self.quiz.save()
+        self.assertEqual(self.put(self.students[1]).data['message'], 'Quiz has ended.')
+
+    def test_join_then_leave(self):
+        self.put(self.students[0])
+        self.put(self.students[1])
+        QuizParticipant.objects.filter(quiz=self.quiz, participant=self.students[0]).delete()
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).participant_count, 1)
+        QuizParticipant.objects.filter(quiz=self.quiz).delete()
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).participant_count, 0)
+
+    def test_missing_quiz(self):
+        self.assertEqual(self.put(self.students[0], 'abc').status_code, 404)
+        self.assertEqual(self.put(self.students[0], 999999).status_code, 404)
+
+class QuizAutoEnrollTests(TestCase):
+    """
+    Students of the course are made participants of an auto enrollment
+    quiz when it is created and when they join the course later.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.students = []
+        for i in range(4):
+            student = User.objects.create_user('student{0}'.format(i), 'student{0}@quizmaker.com'.format(i), 'password', user_type='S')
+            cls.students.append(Student.objects.create(user=student, student_id=str(i)))
+        cls.course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        cls.course.students.add(*cls.students[:2])
+
+    def create_quiz(self, auto_enroll=True, end=timedelta(hours=1)):
+        now = timezone.now()
+        return Quiz.objects.create(
+            owner=self.instructor,
+            course=self.course,
+            name='Quiz',
+            start=now + timedelta(minutes=5),
+            end=now + end,
+            auto_enroll=auto_enroll,
+        )
+
+    def participant_ids(self, quiz):
+        return set(QuizParticipant.objects.filter(quiz=quiz).values_list('participant_id', flat=True))
+
+    def test_enroll_on_create(self):
+        quiz = self.create_quiz()
+        self.assertEqual(self.participant_ids(quiz), {self.students[0].pk, self.students[1].pk})
+        self.assertEqual(Quiz.objects.get(id=quiz.id).participant_count, 2)
+        quiz.save()
+        self.assertEqual(QuizParticipant.objects.filter(quiz=quiz).count(), 2)
+
+    def test_enroll_added_students(self):
+        quiz = self.create_quiz()
+        self.course.students.add(self.students[2])
+        self.students[3].course_set.add(self.course)
+        self.assertEqual(self.participant_ids(quiz), {student.pk for student in self.students})
+        self.assertEqual(Quiz.objects.get(id=quiz.id).participant_count, 4)
+
+    def test_not_enrolled(self):
+        quiz = self.create_quiz(auto_enroll=False)
+        ended = self.create_quiz(end=-timedelta(hours=1))
+        self.course.students.add(self.students[2])
+        self.assertEqual(self.participant_ids(quiz), set())
+        self.assertEqual(self.participant_ids(ended), set())
+
+class QuizSessionTests(TestCase):
+    """
+    The start time is recorded when a participant joins, the deadline
+    follows from the quiz end and duration, and is checked without a query.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.student = User.objects.create_user('student', 'student@quizmaker.com', 'password', user_type='S')
+        Student.objects.create(user=cls.student, student_id='1')
+        course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+        now = timezone.now()
+        cls.quiz = Quiz.objects.create(
+            owner=cls.instructor,
+            course=course,
+            name='Quiz',
+            start=now - timedelta(minutes=1),
+            end=now + timedelta(hours=1),
+            duration=30,
+            is_private=True,
+        )
+        cls.questions = [
+            Question.objects.create(question='Question {0}'.format(i), answer='A', point=5)
+            for i in range(4)
+        ]
+        cls.quiz.questions.add(*cls.questions)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def join(self):
+        response = self.client.put('/api/quiz/append/{0}'.format(self.quiz.id), {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def submit(self):
+        return self.client.post('/api/question/answers/create', {
+            'quiz_id': self.quiz.id,
+            'finished_in': '0:01',
+            'completion': 100,
+            'answers': [{'question_id': self.questions[0].id, 'answer': 'A'}],
+        }, format='json')
+
+    def test_deadline(self):
+        data = self.join()
+        self.assertEqual(data['deadline'], data['started'] + timedelta(minutes=30))
+        self.assertIsNotNone(QuizParticipant.objects.get(quiz=self.quiz).started)
+
+    def test_autosave(self):
+        self.join()
+        answers = [{'question_id': self.questions[0].id, 'answer': 'A'}]
+        # the UPDATE of the answers alone
+        with self.assertNumQueries(1):
+            response = self.client.put('/api/quiz/session/{0}'.format(self.quiz.id), {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/quiz/session/{0}'.format(self.quiz.id))
+        self.assertEqual(response.data['answers'], {self.questions[0].id: 'A'})
+
+        # the answers outlive the cache
+        cache.clear()
+        response = self.client.get('/api/quiz/session/{0}'.format(self.quiz.id))
+        self.assertEqual(response.data['answers'], {self.questions[0].id: 'A'})
+
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(QuizParticipant.objects.get(quiz=self.quiz).draft, '')
+        response = self.client.put('/api/quiz/session/{0}'.format(self.quiz.id), {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_timing_from_server(self):
+        self.join()
+        self.assertEqual(self.submit().status_code, 200)
+        participant = QuizParticipant.objects.get(quiz=self.quiz)
+        self.assertRegex(participant.finished_in, r'^0:0\d$')
+        self.assertEqual(participant.completion, 25)
+
+    def test_late(self):
+        self.join()
+        QuizParticipant.objects.filter(quiz=self.quiz).update(started=timezone.now() - timedelta(minutes=40))
+        cache.clear()
+        response = self.client.put('/api/quiz/session/{0}'.format(self.quiz.id), {'answers': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.submit().status_code, 400)
+        self.assertFalse(ParticipantAnswer.objects.exists())
+
+    def test_not_joined(self):
+        self.assertEqual(self.submit().status_code, 400)
+        self.assertFalse(QuizParticipant.objects.exists())
+
+    def test_not_started(self):
+        # enrolled without joining, the session starts with the quiz
+        Quiz.objects.filter(id=self.quiz.id).update(start=timezone.now() + timedelta(hours=1))
+        QuizParticipant.objects.create(quiz=self.quiz, participant=self.student)
+        response = self.client.put('/api/quiz/session/{0}'.format(self.quiz.id), {'answers': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.submit().status_code, 400)
+        self.assertFalse(ParticipantAnswer.objects.exists())
+
+    def test_submit_twice(self):
+        self.join()
+        self.assertEqual(self.submit().status_code, 200)
+        response = self.submit()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ParticipantAnswer.objects.count(), 1)
+        self.assertEqual(QuizParticipant.objects.get(quiz=self.quiz).grade, 5)
+
+class QuizFeedVersionTests(TestCase):
+    def test_lost_version_does_not_repeat(self):
+        versions = {feed.get_version()}
+        feed.invalidate()
+        versions.add(feed.get_version())
+        feed.get_cache().delete(feed.VERSION_KEY)
+        versions.add(feed.get_version())
+        self.assertEqual(len(versions), 3)
+
+class QuizQuestionCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', 'owner@quizmaker.com', 'password', user_type='S')
+        cls.quiz = Quiz.objects.create(owner=owner, name='Quiz')
+        cls.questions = [Question.objects.create(question='Question {0}'.format(i)) for i in range(3)]
+
+    def question_count(self):
+        return Quiz.objects.get(id=self.quiz.id).question_count
+
+    def test_remove_unlinked(self):
+        self.quiz.questions.add(self.questions[0])
+        self.quiz.questions.add(self.questions[0], self.questions[1])
+        self.assertEqual(self.question_count(), 2)
+        self.quiz.questions.remove(self.questions[1], self.questions[2])
+        self.assertEqual(self.question_count(), 1)
+        self.questions[2].quiz_set.remove(self.quiz)
+        self.assertEqual(self.question_count(), 1)
+        self.questions[0].quiz_set.remove(self.quiz)
+        self.assertEqual(self.question_count(), 0)
+
+class QuizWeightingTests(TestCase):
+    """
+    The graded quizzes of an owner in a course, or without a course, add up
+    to at most 100 percent.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('instructor', 'instructor@quizmaker.com', 'password', user_type='I')
+        Instructor.objects.create(user=cls.instructor, is_approved=True)
+        cls.student = User.objects.create_user('student', 'student@quizmaker.com', 'password', user_type='S')
+        cls.course = Course.objects.create(owner=cls.instructor.instructor, name='Course')
+
+    def percentages(self, owner):
+        return list(Quiz.objects.filter(owner=owner).order_by('id').values_list('percentage', flat=True))
+
+    def test_fit_percentage(self):
+        for percentage in (60, 30, 50):
+            Quiz.objects.create(owner=self.instructor, course=self.course, name='Quiz', percentage=percentage)
+        self.assertEqual(self.percentages(self.instructor), [60, 30, 10])
+
+    def test_fit_percentage_without_course(self):
+        for percentage in (70, 70):
+            Quiz.objects.create(owner=self.student, name='Quiz', percentage=percentage)
+        self.assertEqual(self.percentages(self.student), [70, 30])
+
+    def bulk_create(self, owner, course, percentages):
+        Quiz.objects.bulk_create([
+            Quiz(owner=owner, course=course, name='Quiz', slug='quiz-{0}-{1}'.format(owner.id, i), percentage=percentage)
+            for i, percentage in enumerate(percentages)
+        ])
+
+    def test_fit_course_percentages(self):
+        self.bulk_create(self.instructor, self.course, (60, 30, 50, 20))
+        fit_course_percentages(self.course.id, self.instructor.id)
+        self.assertEqual(self.percentages(self.instructor), [60, 30, 10, 0])
+
+    def test_fit_course_percentages_without_course(self):
+        self.bulk_create(self.student, None, (70, 70))
+        fit_course_percentages(None, self.student.id)
+        self.assertEqual(self.percentages(self.student), [70, 30])
+
+class QuizTransferTests(TestCase):
+    """
+    A quiz bank exported as CSV or JSON Lines imports back as the same
+    quizzes and questions.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@quizmaker.com', 'password', user_type='S')
+        cls.other = User.objects.create_user('other', 'other@quizmaker.com', 'password', user_type='S')
+        now = timezone.now().replace(microsecond=0)
+        for i in range(2):
+            quiz = Quiz.objects.create(
+                owner=cls.owner,
+                name='Quiz {0}'.format(i),
+                description='Description, with "quotes"',
+                start=now,
+                end=now + timedelta(hours=1),
+                percentage=20,
+            )
+            quiz.questions.add(
+                Question.objects.create(question_number=1, question='Which?', question_type='multichoice',
+                                        answer='B', A='a', B='b', C='c', D='d', point=5),
+                Question.objects.create(question_number=2, question='Explain.', question_type='text', point=10),
+            )
+
+    def quiz_bank(self, owner):
+        quizzes = []
+        for quiz in Quiz.objects.filter(owner=owner).order_by('id'):
+            quizzes.append((
+                quiz.name, quiz.description, quiz.start, quiz.end, quiz.be_graded, quiz.percentage,
+                list(quiz.questions.order_by('question_number').values_list(
+                    'question_number', 'question_type', 'question', 'point', 'answer', 'A', 'B', 'C', 'D'
+                )),
+            ))
+        return quizzes
+
+    def round_trip(self, file_format):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/api/quiz/export/{0}'.format(file_format))
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+
+        client.force_authenticate(self.other)
+        upload = SimpleUploadedFile('quizzes.{0}'.format(file_format), content)
+        response = client.post('/api/quiz/import/{0}'.format(file_format), {'file': upload})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.quiz_bank(self.other), self.quiz_bank(self.owner))
+
+    def test_csv(self):
+        self.round_trip('csv')
+
+    def test_jsonl(self):
+        self.round_trip('jsonl')
+
+    def test_invalid_row(self):
+        client = APIClient()
+        client.force_authenticate(self.other)
+        content = b'{"quiz": "a", "name": "Quiz"}\n{"quiz": "a", "question": "Q", "point": "many"}\n'
+        upload = SimpleUploadedFile('quizzes.jsonl', content)
+        response = client.post('/api/quiz/import/jsonl', {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Quiz.objects.filter(owner=self.other).exists())
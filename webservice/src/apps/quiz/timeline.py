@@ -0,0 +1,82 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from quiz.models import Quiz, QuizParticipant
+
+def get_cache():
+    return caches[getattr(settings, 'QUIZ_TIMELINE_CACHE', 'default')]
+
+def version_key(user_id):
+    return 'quiz-timeline-version:{0}'.format(user_id)
+
+def get_version(user_id):
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(version_key(user_id), version, None)
+        version = cache.get(version_key(user_id), version)
+    return version
+
+def invalidate(user_ids):
+    """
+    Give the users a new timeline version, which drops their cached pages
+    and changes their ETags.
+    """
+    get_cache().set_many({version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+def invalidate_quiz(quiz_ids):
+    user_ids = QuizParticipant.objects \
+        .filter(quiz_id__in=quiz_ids) \
+        .exclude(participant_id=None) \
+        .values_list('participant_id', flat=True)
+    invalidate(set(user_ids))
+
+def next_boundary(user_id):
+    """
+    Return when the next quiz of the user ends, the timeline moves then.
+    """
+    return Quiz.objects \
+        .filter(participants__id=user_id) \
+        .filter(end__gt=timezone.now()) \
+        .filter(is_deleted=False) \
+        .order_by('end') \
+        .values_list('end', flat=True) \
+        .first()
+
+def page_key(name, request):
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(repr(query).encode('utf-8')).hexdigest()
+    return 'quiz-timeline:{0}:{1}:{2}:{3}'.format(
+        request.user.id, get_version(request.user.id), name, digest
+    )
+
+def get_page(name, request):
+    """
+    Return (data, headers, etag) of a cached page or None.
+    """
+    page = get_cache().get(page_key(name, request))
+    if page is None:
+        return None
+    data, headers, etag, boundary = page
+    if boundary is not None and boundary <= timezone.now():
+        return None
+    return data, headers, etag
+
+def set_page(name, request, data, headers):
+    """
+    Cache the page until the next quiz of the user ends and return its ETag.
+    """
+    key = page_key(name, request)
+    boundary = next_boundary(request.user.id)
+    etag = '"{0}"'.format(hashlib.md5('{0}:{1}'.format(key, boundary).encode('utf-8')).hexdigest())
+
+    timeout = getattr(settings, 'QUIZ_TIMELINE_CACHE_TIMEOUT', 300)
+    if boundary is not None:
+        timeout = min(timeout, int((boundary - timezone.now()).total_seconds()))
+    if timeout > 0:
+        get_cache().set(key, (list(data), headers, etag, boundary), timeout)
+    return etag
@@ -0,0 +1,197 @@
+import csv
+import json
+from collections import OrderedDict
+
+from django.db import connection, transaction
+from django.utils.translation import gettext_lazy as _
+
+from notification.models import OutgoingMail
+from question.models import Question
+from quiz.models import Quiz
+from quiz import feed
+from quiz.api.serializers import QuizRowSerializer
+from quiz.weighting import fit_course_percentages
+from utils import streaming
+from utils.utils import unique_slugs_generator
+
+FORMATS = streaming.FORMATS
+
+QUIZ_FIELDS = ('name', 'description', 'start', 'end', 'be_graded', 'percentage')
+QUESTION_FIELDS = ('question_number', 'question_type', 'question', 'point', 'answer', 'A', 'B', 'C', 'D')
+COLUMNS = ('quiz',) + QUIZ_FIELDS + QUESTION_FIELDS
+
+def import_error(message, line=0, errors=None):
+    return {
+        'message': message,
+        'line': line,
+        'errors': errors or {},
+    }
+
+def read_rows(lines, file_format):
+    """
+    Yield (line number, row) of a CSV or JSON Lines file given as an
+    iterable of text lines. Empty values are left out so the defaults of
+    the fields apply, a line which cannot be parsed is yielded as None.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {
+                key: value for key, value in row.items() if key and value not in ('', None)
+            }
+        return
+
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if isinstance(row, dict):
+            row = {key: value for key, value in row.items() if value not in ('', None)}
+        else:
+            row = None
+        yield line_num, row
+
+def validate_rows(rows):
+    """
+    Validate every row and group the questions by quiz. Returns the quizzes
+    as a list of {'fields': .., 'questions': [..]} and a list of errors.
+    """
+    quizzes = OrderedDict()
+    errors = []
+    for line_num, row in rows:
+        if row is None:
+            errors.append(import_error(_('Row could not be read.'), line_num))
+            continue
+
+        serializer = QuizRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append(import_error(_('Row is not valid.'), line_num, serializer.errors))
+            continue
+
+        data = serializer.validated_data
+        quiz = quizzes.get(data['quiz'])
+        if quiz is None:
+            if 'name' not in data:
+                errors.append(import_error(_('Quiz name is required.'), line_num))
+                continue
+            quiz = quizzes[data['quiz']] = {
+                'fields': {field: data[field] for field in QUIZ_FIELDS if field in data},
+                'questions': [],
+            }
+
+        if 'question' in data:
+            fields = {field: data[field] for field in QUESTION_FIELDS if field in data}
+            if fields.get('question_type', Question.MULTICHOICE) != Question.MULTICHOICE:
+                for choice in ('A', 'B', 'C', 'D'):
+                    fields.pop(choice, None)
+            quiz['questions'].append(fields)
+
+    return list(quizzes.values()), errors
+
+def bulk_create_with_ids(model, objs):
+    """
+    bulk_create which sets the primary keys on backends that cannot return
+    them. On sqlite it must run in a transaction which already wrote, the
+    database lock is held then so the new rows are the ones after the last
+    id. Other backends let concurrent inserts take ids in between, the
+    rows are inserted one at a time there.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+
+    if connection.vendor != 'sqlite':
+        for obj in objs:
+            obj.save(force_insert=True)
+        return objs
+
+    last_id = model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    model.objects.bulk_create(objs)
+    new_ids = model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)
+    for obj, id in zip(objs, new_ids):
+        obj.id = id
+    return objs
+
+def import_quizzes(owner, rows, course=None):
+    """
+    Create the quizzes and questions of the rows for the owner. The whole
+    file is validated first; if any row is not valid a list of errors is
+    returned and nothing is written. Otherwise the quizzes, the questions
+    and the links between them are written with one bulk insert each.
+    Returns the created quizzes and the errors.
+    """
+    quizzes, errors = validate_rows(rows)
+    if errors or not quizzes:
+        return [], errors
+
+    if not owner.is_instructor:
+        course = None
+
+    with transaction.atomic():
+        slugs = unique_slugs_generator(Quiz, [quiz['fields']['name'] for quiz in quizzes])
+        objs = Quiz.objects.bulk_create([
+            Quiz(
+                owner=owner,
+                course=course,
+                slug=slug,
+                is_private=owner.is_instructor,
+                question_count=len(quiz['questions']),
+                **quiz['fields']
+            ) for quiz, slug in zip(quizzes, slugs)
+        ])
+        ids = dict(Quiz.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        for obj in objs:
+            obj.id = ids[obj.slug]
+
+        questions = [
+            (obj.id, Question(**fields))
+            for obj, quiz in zip(objs, quizzes) for fields in quiz['questions']
+        ]
+        bulk_create_with_ids(Question, [question for quiz_id, question in questions])
+        Quiz.questions.through.objects.bulk_create([
+            Quiz.questions.through(quiz_id=quiz_id, question_id=question.id)
+            for quiz_id, question in questions
+        ])
+
+        if any(obj.be_graded for obj in objs):
+            fit_course_percentages(course.id if course else None, owner.id)
+            percentages = dict(Quiz.objects.filter(id__in=ids.values()).values_list('id', 'percentage'))
+            for obj in objs:
+                obj.percentage = percentages[obj.id]
+
+        if course is not None:
+            emails = list(course.students.values_list('user__email', flat=True))
+            if emails:
+                OutgoingMail.objects.queue_many([
+                    (
+                        "A NEW QUIZ HAS BEEN CREATED",
+                        "Hello from QuizMaker. You've been added to a quiz lately.",
+                        'se301quizmaker@gmail.com',
+                        emails,
+                    ) for obj in objs
+                ])
+
+    feed.invalidate()
+    return objs, []
+
+def export_rows(quizzes):
+    """
+    Yield one row per question of the quizzes, a quiz without questions
+    gives one row without question fields. The rows are read with one query
+    and a server side iterator so memory does not grow with the bank.
+    """
+    values = ['slug'] + list(QUIZ_FIELDS) + ['questions__' + field for field in QUESTION_FIELDS]
+    rows = quizzes \
+        .order_by('id', 'questions__question_number', 'questions__id') \
+        .values_list(*values) \
+        .iterator(chunk_size=500)
+    for row in rows:
+        yield OrderedDict(zip(COLUMNS, row))
+
+def export_lines(quizzes, file_format):
+    rows = export_rows(quizzes)
+    if file_format == 'csv':
+        return streaming.csv_lines(COLUMNS, (row.values() for row in rows))
+    return streaming.jsonl_lines(rows)
@@ -0,0 +1,49 @@
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from quiz.models import Quiz
+
+HUNDRED = Value(100, output_field=DecimalField(max_digits=100, decimal_places=2))
+
+def percentage_sum(queryset):
+    """
+    Return a subquery summing the percentage of the queryset.
+    """
+    output_field = DecimalField(max_digits=100, decimal_places=2)
+    total = queryset.order_by().values('owner').annotate(total=Sum('percentage')).values('total')
+    return Coalesce(Subquery(total, output_field=output_field), 0, output_field=output_field)
+
+def fit_percentage(quiz):
+    """
+    Lower the percentage of a graded quiz so that the quizzes of its owner in
+    the same course do not add up to more than 100. The other quizzes are
+    summed with one aggregate and the quiz is changed with a conditional
+    UPDATE, the quiz is not saved so no signal is sent again.
+    """
+    if not quiz.be_graded:
+        return
+    others = Quiz.objects \
+        .filter(course_id=quiz.course_id, owner_id=quiz.owner_id) \
+        .exclude(id=quiz.id) \
+        .aggregate(total=Sum('percentage'))['total'] or 0
+    remaining = max(100 - others, 0)
+    if Quiz.objects.filter(id=quiz.id, percentage__gt=remaining).update(percentage=remaining):
+        quiz.percentage = remaining
+
+def fit_course_percentages(course_id, owner_id):
+    """
+    Lower the percentages of the graded quizzes of an owner in a course with
+    one UPDATE so that they add up to at most 100. Earlier quizzes keep their
+    weight, a quiz gets at most what is left by the quizzes created before it.
+    """
+    # course_id is given rather than referenced, so quizzes without a
+    # course match each other as `IS NULL`
+    earlier = Quiz.objects.filter(
+        course_id=course_id,
+        owner_id=owner_id,
+        id__lt=OuterRef('id'),
+    )
+    remaining = Greatest(HUNDRED - percentage_sum(earlier), 0)
+    return Quiz.objects \
+        .filter(course_id=course_id, owner_id=owner_id, be_graded=True) \
+        .update(percentage=Least('percentage', remaining))
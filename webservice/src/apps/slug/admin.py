@@ -0,0 +1,7 @@
+from django.contrib import admin
+from slug.models import SlugCounter
+
+# Register your models here.
+@admin.register(SlugCounter)
+class SlugCounterAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'base', 'value')
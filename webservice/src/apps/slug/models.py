@@ -0,0 +1,63 @@
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q
+from django.utils.translation import gettext_lazy as _
+
+# slugify never produces two hyphens in a row, so numbered slugs can not
+# collide with the plain slug of another name
+SEPARATOR = '--'
+
+def numbered_slug(base, number):
+    if number == 1:
+        return base
+    return '{0}{1}{2}'.format(base, SEPARATOR, number)
+
+class SlugCounterManager(models.Manager):
+    def allocate(self, model, base, count=1):
+        """
+        Reserve `count` unique slugs of the model for the base slug and
+        return them. The counter row is bumped with an UPDATE which locks it
+        until the transaction ends, so concurrent allocations never get the
+        same slug and no slug is ever checked with a query.
+        """
+        scope = model._meta.label_lower
+        counter = self.filter(scope=scope, base=base)
+        with transaction.atomic(using=self.db):
+            if not counter.update(value=F('value') + count):
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(scope=scope, base=base, value=self.used_number(model, base) + count)
+                except IntegrityError:
+                    # created by a concurrent allocation in the meantime
+                    counter.update(value=F('value') + count)
+            value = counter.values_list('value', flat=True).get()
+        return [numbered_slug(base, number) for number in range(value - count + 1, value + 1)]
+
+    def used_number(self, model, base):
+        """
+        Return the highest number used for the base slug by rows which were
+        saved before the counter existed.
+        """
+        slugs = model._default_manager \
+            .filter(Q(slug=base) | Q(slug__startswith=base + SEPARATOR)) \
+            .values_list('slug', flat=True)
+        used = 0
+        for slug in slugs:
+            number = slug[len(base) + len(SEPARATOR):] if slug != base else '1'
+            if number.isdigit():
+                used = max(used, int(number))
+        return used
+
+class SlugCounter(models.Model):
+    scope = models.CharField(_('Model'), max_length=100)
+    base  = models.CharField(_('Base Slug'), max_length=120)
+    value = models.PositiveIntegerField(_('Last Number'), default=0)
+
+    objects = SlugCounterManager()
+
+    class Meta:
+        verbose_name = _('Slug Counter')
+        verbose_name_plural = _('Slug Counters')
+        unique_together = ('scope', 'base')
+
+    def __str__(self):
+        return numbered_slug(self.base, self.value)
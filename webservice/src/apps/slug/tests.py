@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+
+from account.models import User
+from quiz.models import Quiz
+from slug.models import SlugCounter
+from utils.utils import unique_slugs_generator
+
+# Create your tests here.
+class SlugCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@quizmaker.com', 'password', user_type='S')
+
+    def test_allocate(self):
+        self.assertEqual(SlugCounter.objects.allocate(Quiz, 'math', 3), ['math', 'math--2', 'math--3'])
+        self.assertEqual(SlugCounter.objects.allocate(Quiz, 'math'), ['math--4'])
+        self.assertEqual(SlugCounter.objects.allocate(Quiz, 'physics'), ['physics'])
+
+    def test_continues_after_existing_slugs(self):
+        Quiz.objects.bulk_create([
+            Quiz(owner=self.owner, name='Math', slug=slug) for slug in ('math', 'math--5', 'math-club')
+        ])
+        self.assertEqual(SlugCounter.objects.allocate(Quiz, 'math'), ['math--6'])
+
+    def test_unique_slugs(self):
+        slugs = unique_slugs_generator(Quiz, ['Math'] * 3 + ['Physics'])
+        self.assertEqual(len(set(slugs)), 4)
+
+class SlugCounterConcurrencyTests(TransactionTestCase):
+    """
+    Allocations running at the same time on their own connections never
+    hand out the same slug.
+    """
+    thread_count = 8
+    per_thread = 5
+
+    def test_concurrent_allocate(self):
+        slugs = []
+        errors = []
+        start = threading.Barrier(self.thread_count)
+
+        def allocate():
+            try:
+                start.wait()
+                for i in range(self.per_thread):
+                    while True:
+                        try:
+                            slugs.extend(SlugCounter.objects.allocate(Quiz, 'exam'))
+                            break
+                        except OperationalError as e:
+                            # the in-memory sqlite test database reports a
+                            # conflicting writer instead of waiting for it,
+                            # the allocation was rolled back and is retried
+                            if 'locked' not in str(e):
+                                raise
+                            time.sleep(0.001)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=allocate) for i in range(self.thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(slugs), self.thread_count * self.per_thread)
+        self.assertEqual(len(set(slugs)), len(slugs))
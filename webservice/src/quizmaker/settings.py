@@ -42,11 +42,16 @@ INSTALLED_APPS = [
     'course.apps.CourseConfig',
     'question.apps.QuestionConfig',
     'quiz.apps.QuizConfig',
+    'notification.apps.NotificationConfig',
+    'slug.apps.SlugConfig',
+    'metrics.apps.MetricsConfig',
+    'benchmark.apps.BenchmarkConfig',
     'rest_framework',
     'coreapi',
 ]
 
 MIDDLEWARE = [
+    'metrics.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +93,49 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory by default. Set REDIS_URL to share the cache between worker
+# processes, this needs the django-redis package.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # room for a session per participant of a running quiz, entries
+        # evicted when it is full are read again from the database
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+
+# Cache used for the public quiz feed and the longest time a page is kept
+QUIZ_FEED_CACHE = 'default'
+QUIZ_FEED_CACHE_TIMEOUT = 300
+
+# Cache used for the participator/end and participator/waiting timelines
+QUIZ_TIMELINE_CACHE = 'default'
+QUIZ_TIMELINE_CACHE_TIMEOUT = 300
+
+# Cache of the quiz fields checked when a participant joins a quiz
+QUIZ_SNAPSHOT_CACHE = 'default'
+QUIZ_SNAPSHOT_CACHE_TIMEOUT = 60
+
+# Joins and enrollments update participant_count as they happen. Counts
+# changed behind the receivers, e.g. by raw SQL, are recomputed with
+#   python manage.py rebuild_quiz_counters [--running --interval 10]
+QUIZ_COUNTER_INTERVAL = 10
+
+# Cache of the start times of running quiz sessions and the seconds a
+# submission is accepted after the deadline. It may lose entries, the start
+# times are kept on the participants; autosaved answers are stored there only.
+QUIZ_SESSION_CACHE = 'default'
+QUIZ_SESSION_GRACE = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -122,7 +170,12 @@ USE_TZ = True
 
 #SERVER_EMAIL = os.environ.get('EMAIL')
 #DEFAULT_FROM_EMAIL = os.environ.get('EMAIL')
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Mails are queued by notification.models.OutgoingMail and delivered by the
+# send_queued_mail command. Set EMAIL_BACKEND to
+# django.core.mail.backends.console.EmailBackend or .filebased.EmailBackend
+# to run without a mail server.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_mails')
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_HOST_USER = 'se301quizmaker@gmail.com'
@@ -153,6 +206,7 @@ STATICFILES_DIRS = [
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'account.api.authentication.TokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -160,8 +214,28 @@ REST_FRAMEWORK = {
         'account.api.permissions.IsActive',
         'account.api.permissions.IsOwnerOrReadOnly'
     ),
+    # only requests with ?page_size or ?cursor are paginated
+    'DEFAULT_PAGINATION_CLASS': 'utils.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
+# Auth tokens expire this many days after login, delete expired tokens
+# with a daily cron job:
+#   0 3 * * * python manage.py purge_auth_tokens
+AUTH_TOKEN_LIFETIME = 30
+
+# Cache which keeps the user ids of auth tokens for this many seconds
+AUTH_TOKEN_CACHE = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Request metrics, see api/metrics/. A statement which runs this many times
+# in one request is logged, as a possible N+1 query when its parameters
+# differ and as a repeated query when they are the same.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+METRICS_SERVER_TIMING = True
+METRICS_SAMPLE_SIZE = 1000
+METRICS_DUPLICATE_QUERY_THRESHOLD = 5
+
 # AUTHENTICATION_CASE_SENSITIVE = 'both'
 # AUTHENTICATION_METHOD = 'both'
 # AUTHENTICATION_BACKENDS = [
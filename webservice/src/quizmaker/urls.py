@@ -39,6 +39,7 @@ urlpatterns = [
     path('api/course/', include('course.api.urls')),
     path('api/quiz/', include('quiz.api.urls')),
     path('api/question/', include('question.api.urls')),
+    path('api/metrics/', include('metrics.api.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks past the last row of the previous page
+    instead of using OFFSET, so every page costs the same however deep it is.
+
+    The ordering of the queryset is kept and `pk` is appended as tiebreaker.
+    The response body stays a plain list; the next page is announced with a
+    `Link: <url>; rel="next"` header. Views can set `page_size` to override
+    the default, clients can ask for a smaller or bigger page with
+    `page_size` up to `max_page_size`.
+
+    Pagination is opt-in: only requests with `page_size` or `cursor` are
+    paginated, others get the whole list as before, since clients which do
+    not follow the `Link` header would lose every page but the first.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.next_position = None
+        if not self.is_requested(request):
+            return None
+        page_size = self.get_page_size(request, view)
+        if not page_size:
+            return None
+
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_seek_filter(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:page_size + 1])
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_position = [
+                self.get_value(results[-1], field) for field in self.ordering
+            ]
+        return results
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers['Link'] = '<{0}>; rel="next"'.format(next_link)
+        return Response(data, headers=headers)
+
+    def is_requested(self, request):
+        return self.page_size_query_param in request.query_params \
+            or self.cursor_query_param in request.query_params
+
+    def get_page_size(self, request, view):
+        page_size = getattr(view, 'page_size', None) or self.page_size
+        if self.page_size_query_param:
+            try:
+                value = int(request.query_params[self.page_size_query_param])
+                if value > 0:
+                    page_size = min(value, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return page_size
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not ordering:
+            return ['pk']
+        pk_names = ('pk', queryset.model._meta.pk.name)
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return ordering
+
+    def get_value(self, instance, field):
+        value = getattr(instance, field.lstrip('-'))
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def get_seek_filter(self, position):
+        """
+        Return rows which come after the position in the ordering:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        seek = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = '{0}__lt' if field.startswith('-') else '{0}__gt'
+            seek |= equal & Q(**{lookup.format(name): value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
@@ -0,0 +1,50 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+FORMATS = ('csv', 'jsonl')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+class Echo(object):
+    """
+    File-like object which returns what is written, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def csv_lines(columns, rows):
+    """
+    Yield the header and the rows, sequences of values, as CSV lines.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([csv_value(value) for value in row])
+
+def jsonl_lines(rows):
+    """
+    Yield the rows, dicts, as JSON Lines.
+    """
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+def streaming_response(lines, file_format, filename):
+    """
+    Send the lines as a file download without holding them in memory.
+    """
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = 'attachment; filename="{0}.{1}"'.format(filename, file_format)
+    return response
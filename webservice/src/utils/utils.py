@@ -10,14 +10,21 @@ def random_string_generator(size=10, chars=string.ascii_lowercase + string.digit
     return ''.join(random.choice(chars) for _ in range(size))
 
 def unique_slug_generator(instance, new_slug=None):
+    from slug.models import SlugCounter
     if new_slug is not None:
         slug = new_slug
     else:
-        slug = slugify(instance.name)
+        slug = slugify(instance.name) or instance._meta.model_name
+    return SlugCounter.objects.allocate(instance.__class__, slug)[0]
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(slug=slug).exists()
-    if qs_exists:
-        new_slug = "{slug}-{randstr}".format(slug=slug, randstr=random_string_generator(size=4))
-        return unique_slug_generator(instance, new_slug=new_slug)
-    return slug
+def unique_slugs_generator(model, names):
+    """
+    Return unique slugs for the names with one allocation per distinct name,
+    for creating many rows with bulk_create.
+    """
+    from slug.models import SlugCounter
+    bases = [slugify(name) or model._meta.model_name for name in names]
+    allocated = {}
+    for base in set(bases):
+        allocated[base] = iter(SlugCounter.objects.allocate(model, base, bases.count(base)))
+    return [next(allocated[base]) for base in bases]